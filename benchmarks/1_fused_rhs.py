@@ -0,0 +1,61 @@
+from geodpy import Geodesics
+from geodpy.to_lambda import numba
+from geodpy.coordinates import OblongEllipsoid
+
+from sympy import *
+import numpy as np
+
+import timeit
+
+# Possible symbols
+#τ,t,r,a,b,c,θ,φ,η,ψ,x,y 
+
+# Compares the cost of one evaluation of the geodesics equations of the Kerr metric, using the four separate lambda
+# functions (as before), the single fused function with common subexpressions eliminated, or the same function
+# JIT-compiled with numba (if installed).
+def main(calls: int = 20000) -> None:
+    # Metric config
+    t, r, θ, φ = OblongEllipsoid.coords
+    rs, a = symbols('rs a')
+    p2 = r*r + a*a*(cos(θ))**2 
+    Δ = r*r + a*a - r*rs
+    gₘₖ = Matrix([
+        [1-rs*r/(p2)             ,0      ,0    ,(a*r*rs*sin(θ)**2)/(p2)                           ],
+        [0                       ,-p2/Δ  ,0    ,0                                                 ],
+        [0                       ,0      ,-p2  ,0                                                 ],
+        [(a*r*rs*sin(θ)**2)/(p2) ,0      ,0    ,-(r*r + a*a + (a*a*r*rs*sin(θ)**2)/(p2))*sin(θ)**2]
+    ])
+
+    print("Calculating geodesics")
+    geodesics = Geodesics(OblongEllipsoid, gₘₖ, params=(rs, a))
+    params = (1, 0.495)
+    state  = np.array([0, 4, np.pi/2 - 0.1, 0, 1.6, 0.1, 0.01, 0.1])
+
+    equations = geodesics._dₛuᵏ_lambda
+    def separate():
+        x0, x1, x2, x3, v0, v1, v2, v3 = state
+        return v0, v1, v2, v3, *(equation(x0, x1, x2, x3, v0, v1, v2, v3, *params) for equation in equations)
+
+    fused_math  = geodesics.rhs("math")
+    fused_numpy = geodesics.rhs("numpy")
+    out = np.empty(8)
+
+    assert np.allclose(separate(), fused_math(state, out, *params))
+
+    candidates = [
+        ("separate lambdas", separate),
+        ("fused (numpy)"   , lambda: fused_numpy(state, out, *params)),
+        ("fused (math)"    , lambda: fused_math(state, out, *params)),
+    ]
+
+    if numba is not None:
+        fused_numba = Geodesics(OblongEllipsoid, gₘₖ, params=(rs, a), backend="numba").rhs()
+        fused_numba(state, out, *params) # Triggers the compilation, or loads it from the cache.
+        candidates.append(("fused (numba)", lambda: fused_numba(state, out, *params)))
+
+    for name, function in candidates:
+        seconds = timeit.timeit(function, number=calls)
+        print(f"{name:<18}: {seconds/calls*1e6:8.2f} µs per call")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from geodpy import Geodesics, Body
+from geodpy import Geodesics, Body, horizon_event
 from geodpy.utilities import basic
 from geodpy.plotters import PolarPlot
 from geodpy.coordinates import Spherical
@@ -26,13 +26,14 @@ def schwarzschild(rs: float, ro: float, h: float, k: float, T: float|None = None
     vel = [k/(1-rs/ro), 0, 0, h/(ro**2)]
     if verbose == 1: print(f"h={h}, k={k}")
 
-    # Metric config
+    # Metric config (rs is kept symbolic, so the geodesics are the same for any of its values)
     coordinates = Spherical
     t, r, θ, φ = Spherical.coords
+    rs_ = symbols('rs')
 
     gₘₖ = Matrix([
-        [1-rs/r     ,0          ,0          ,0          ],
-        [0          ,1/(rs/r-1) ,0          ,0          ],
+        [1-rs_/r    ,0          ,0          ,0          ],
+        [0          ,1/(rs_/r-1),0          ,0          ],
         [0          ,0          ,-r**2      ,0          ],
         [0          ,0          ,0          ,-r**2 * sin(θ)**2]
     ])
@@ -43,10 +44,11 @@ def schwarzschild(rs: float, ro: float, h: float, k: float, T: float|None = None
     solver_kwargs = {
         "time_interval": (0,T),           
         "method"       : "Radau",          
-        "max_step"     : T*1e-3,
+        "max_step"     : np.inf,           # The step is only chosen for accuracy,
+        "samples"      : 5000,             # while the plots get evenly spaced points.
         "atol"         : 1e-8,              
         "rtol"         : 1e-8,              
-        "events"       : None,              
+        "events"       : [horizon_event(rs)], # Stops just outside the horizon, instead of grinding towards it.
     }
 
     # Basic run config
@@ -58,6 +60,7 @@ def schwarzschild(rs: float, ro: float, h: float, k: float, T: float|None = None
         "simplify"     : True,
         "solver_kwargs": solver_kwargs, 
         "verbose"      : verbose, 
+        "params"       : {rs_: rs},
     }
     body = basic(**args_basic)
 
@@ -49,7 +49,8 @@ def lemaitre(rs: float, ro: float, h: float, sim_T: float|None = None, output_kw
     solver_kwargs = {
         "time_interval": (0,sim_T),           
         "method"       : "Radau",          
-        "max_step"     : sim_T*1e-3,
+        "max_step"     : np.inf,           # The step is only chosen for accuracy,
+        "samples"      : 5000,             # while the plots get evenly spaced points.
         "atol"         : 1e-8,              
         "rtol"         : 1e-8,              
         "events"       : None,              
@@ -0,0 +1,38 @@
+from geodpy import Geodesics, Camera, RayTracer, celestial_image
+from geodpy.coordinates import OblongEllipsoid
+from kerr import metric, radii
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import os
+
+# Initial values
+rs = 1
+a = 0.45
+ro = 30              # Distance of the camera
+θ_camera = np.pi/2.2 # Slightly above the equator
+assert a < rs/2
+
+# Image config
+width, height = 320, 240
+fov = np.pi/6
+save_png = False
+
+# Every pixel is traced back from the camera until it falls in the blackhole or escapes past r = 200.
+gₘₖ, (rs_, a_) = metric()
+geodesics = Geodesics(OblongEllipsoid, gₘₖ, (rs_, a_))
+camera = Camera(geodesics, [0, ro, θ_camera, 0], width, height, fov, params={rs_: rs, a_: a})
+
+print(f"Tracing {width*height} rays")
+pixels = RayTracer(camera, r_horizon=radii(rs, a)[0], r_escape=200).render()
+
+# The sky is drawn as a checkerboard, which shows how the light is bent around the shadow of the blackhole.
+plt.imshow(celestial_image(pixels))
+plt.title(f"Shadow of a rotating blackhole, a = {a}")
+plt.axis("off")
+
+if save_png:
+    if not os.path.exists("outputs"): os.makedirs("outputs")
+    plt.savefig("outputs/shadow_kerr.png", dpi=300)
+plt.show()
@@ -1,4 +1,4 @@
-from geodpy import Geodesics, Body
+from geodpy import Geodesics, Body, horizon_event
 from geodpy.utilities import basic
 from geodpy.plotters import PolarPlot, CartesianPlot3D
 from geodpy.coordinates import OblongEllipsoid
@@ -50,6 +50,20 @@ def contravariant_rdot2(r: float, rs: float, a: float, k: float, h: float) -> fl
 def contravariant_phidot(r: float, rs: float, a: float, k: float, h: float) -> float:
         return 1/(r*r + a*a - r*rs) * (a*rs*k/r + (1 - rs/r)*h)
 
+# Returns the Kerr metric in Boyer-Lindquist coordinates, with rs and a kept symbolic, and these 2 symbols.
+def metric() -> tuple[Matrix, tuple[Symbol, Symbol]]:
+    t, r, θ, φ = OblongEllipsoid.coords
+    rs_, a_ = symbols('rs a')
+    p2 = r*r + a_*a_*(cos(θ))**2 
+    Δ = r*r + a_*a_ - r*rs_
+    gₘₖ = Matrix([
+        [1-rs_*r/(p2)              ,0      ,0    ,(a_*r*rs_*sin(θ)**2)/(p2)                              ],
+        [0                         ,-p2/Δ  ,0    ,0                                                      ],
+        [0                         ,0      ,-p2  ,0                                                      ],
+        [(a_*r*rs_*sin(θ)**2)/(p2) ,0      ,0    ,-(r*r + a_*a_ + (a_*a_*r*rs_*sin(θ)**2)/(p2))*sin(θ)**2]
+    ])
+    return gₘₖ, (rs_, a_)
+
 # Kerr example function
 def kerr(rs: float, ro: float, h: float, k: float, a: float, θ_init: float = np.pi/2, T: float|None = None, output_kwargs: dict = {}, verbose: int = 1, dim: int = 2) -> None:
     # Initial values
@@ -66,27 +80,20 @@ def kerr(rs: float, ro: float, h: float, k: float, a: float, θ_init: float = np
 
     if verbose == 1: print(f"h={h}, k={k}, a={a}, r_ext={r_ext}, r_int={r_int}, ergosphere_radius={ergo}")
 
-    # Metric config
+    # Metric config (rs and a are kept symbolic, so the geodesics are the same for any of their values)
     coordinates = OblongEllipsoid
-    t, r, θ, φ = OblongEllipsoid.coords
-    p2 = r*r + a*a*(cos(θ))**2 
-    Δ = r*r + a*a - r*rs
-    gₘₖ = Matrix([
-        [1-rs*r/(p2)             ,0      ,0    ,(a*r*rs*sin(θ)**2)/(p2)                           ],
-        [0                       ,-p2/Δ  ,0    ,0                                                 ],
-        [0                       ,0      ,-p2  ,0                                                 ],
-        [(a*r*rs*sin(θ)**2)/(p2) ,0      ,0    ,-(r*r + a*a + (a*a*r*rs*sin(θ)**2)/(p2))*sin(θ)**2]
-    ])
+    gₘₖ, (rs_, a_) = metric()
 
     # Solver config
     if T is None: T = 2*np.pi*(2*ro*ro*ro/rs)**(1/2) # Third law of Kepler
     solver_kwargs = {
         "time_interval": (0,T),           
         "method"       : "Radau",          
-        "max_step"     : T*1e-4,
+        "max_step"     : np.inf,           # The step is only chosen for accuracy,
+        "samples"      : 5000,             # while the plots get evenly spaced points.
         "atol"         : 1e-4,              
         "rtol"         : 1e-4,              
-        "events"       : None,              
+        "events"       : [horizon_event(rs, a)], # Stops just outside the outer horizon, instead of grinding towards it.
     }
 
     # Basic run config
@@ -98,6 +105,7 @@ def kerr(rs: float, ro: float, h: float, k: float, a: float, θ_init: float = np
         "simplify"     : False,
         "solver_kwargs": solver_kwargs, 
         "verbose"      : verbose, 
+        "params"       : {rs_: rs, a_: a},
     }
     body = basic(**args_basic)
 
@@ -1,3 +1,12 @@
 from .geodesics import Geodesics
+from .hamiltonian import HamiltonianGeodesics
+from .christoffel import Christoffel
+from .cache import GeodesicsCache
 from .body import Body
-from .to_lambda import expr_to_lambda, vector_to_lambda
+from .storage import TrajectoryStore
+from .trajectory import Trajectory
+from .ensemble import Ensemble
+from .raytracer import Camera, RayTracer, celestial_image
+from .orbits import OrbitAnalysis
+from .events import horizon_event, escape_event, light_events, periapsis_event, apoapsis_event, metric_event, coordinate_singularity_event, static_limit_event
+from .to_lambda import expr_to_lambda, vector_to_lambda, matrix_to_lambda, fused_vector_to_lambda, fused_jacobian_to_lambda, fused_system_to_lambda, fused_matrix_to_lambda, jit_lambda
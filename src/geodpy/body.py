@@ -1,31 +1,102 @@
 from typing import Callable
+import os
+import warnings
 
 from .geodesics import Geodesics
-from .coordinates import Cartesian, Spherical
+from .hamiltonian import HamiltonianGeodesics
+from .coordinates import Coordinates, Cartesian, Spherical
+from .integrators import fixed_step_methods
+from .storage import TrajectoryStore, write_checkpoint, read_checkpoint
+from .trajectory import Trajectory
+from .events import light_events
+from .cache import GeodesicsCache
 
 from sympy import *
-from scipy.integrate import solve_ivp
+from scipy.integrate import solve_ivp, OdeSolution
+from scipy.interpolate import CubicHermiteSpline
 from scipy.integrate._ivp.ivp import OdeResult
 import numpy as np
 
 ### Body class ###
 # Class responsible for solving the geodesic differential equation system and storing the results. The class
-# can also calculate the norm of the velocity vector and convert itself a cartesian coordinate system.
+# can also calculate the norm of the velocity vector and convert itself a cartesian coordinate system. With
+# HamiltonianGeodesics, the solver integrates the covariant momentum, which is stored in self.mom, while self.vel
+# still holds the 4-velocity. The points are kept in a single Trajectory buffer, of which self.s, self.pos, self.vel
+# and self.mom are views. With dtype=np.float32, solved trajectories are stored in single precision, e.g. for plotting.
 class Body:
+    implicit_methods: tuple[str] = ("Radau", "BDF", "LSODA")
+    sampling_modes: tuple[str] = ("s", "time", "arc_length")
+    _velocity_lambdas: dict[tuple, Callable] = {} # Lambdified velocity equations, by coordinates and parameters.
 
-    def __init__(self, geodesics: Geodesics = None, position_vec: list = [0,0,0,0], velocity_vec: list = [0,0,0,0]) -> None:
+    def __init__(self, geodesics: Geodesics = None, position_vec: list = [0,0,0,0], velocity_vec: list = [0,0,0,0], dtype: type = np.float64) -> None:
         self._geodesics   = geodesics
         if geodesics is not None: self._coordinates = geodesics._coordinates
         else: self._coordinates = None
 
-        self.s   = np.array([0])
-        self.pos = np.array([[position_vec[0]], [position_vec[1]], [position_vec[2]], [position_vec[3]]])
-        self.vel = np.array([[velocity_vec[0]], [velocity_vec[1]], [velocity_vec[2]], [velocity_vec[3]]])
+        # The initial conditions are kept in double precision, whatever the storage of the trajectory.
+        self._initial = np.array([*position_vec[0:4], *velocity_vec[0:4]], dtype=float)
+        self.dtype = dtype
+        self.trajectory = Trajectory(np.append(0, self._initial)[None, :])
         self.vel_norm = None
+        self.norm     = None
+        self.params   = {}
 
         self.solver_result = None
+        self.interpolant   = None
+        self._interpolant_s = None
+        self.events        = None # Used by solve_trajectory() and resume() when they are given no events.
 
-    # Wrapper for scipy.integrate.solve_ivp
+    # Creates a body moving at the speed of light, a photon, from "position_vec" along the spatial "direction", given
+    # as the coordinate components of its velocity, e.g. [ṙ, θ̇, φ̇] for (t, r, θ, φ) coordinates. uᵗ is solved from
+    # the null condition gₘₖ uᵐ uᵏ = 0, which is quadratic in uᵗ, as its future directed root uᵗ > 0 (the larger one
+    # inside an ergosphere, where both are), and the 4-velocity is scaled so that |p_t| = |g_tₘ uᵐ| = energy, i.e. the
+    # energy at infinity for asymptotically flat metrics. The 4-velocity is thus exactly null, and stays so with
+    # renormalize. Given r_horizon and r_escape, light_events() become the events of the body.
+    @classmethod
+    def photon(cls, geodesics: Geodesics, position_vec: list, direction: list, energy: float = 1, params: dict = None, r_horizon: float = None, r_escape: float = None, dtype: type = np.float64) -> "Body":
+        position  = np.asarray(position_vec, dtype=float)
+        direction = np.asarray(direction, dtype=float)
+        g = geodesics.metric()(position, np.empty((4, 4)), *geodesics.param_values(params))
+
+        # A (uᵗ)² + 2B uᵗ + C = 0 for the spatial velocity "direction".
+        A, B, C = g[0, 0], g[0, 1:] @ direction, direction @ g[1:, 1:] @ direction
+        discriminant = B*B - A*C
+        assert discriminant >= 0 and A != 0, "There is no null 4-velocity along this direction."
+        roots = (-B + np.array([-1, 1]) * np.sqrt(discriminant)) / A
+        assert np.max(roots) > 0, "There is no future directed null 4-velocity along this direction."
+
+        velocity = np.append(np.max(roots), direction)
+        velocity *= energy / np.abs(g[0] @ velocity)
+
+        body = cls(geodesics, position, velocity, dtype)
+        if r_horizon is not None and r_escape is not None: body.events = light_events(r_horizon, r_escape)
+        return body
+
+    # Views of the points of the trajectory, see Trajectory.
+    @property
+    def s(self) -> np.array:
+        return self.trajectory.s
+
+    @property
+    def pos(self) -> np.array:
+        return self.trajectory.pos
+
+    @property
+    def vel(self) -> np.array:
+        return self.trajectory.vel
+
+    @property
+    def mom(self) -> np.array:
+        return self.trajectory.mom
+
+    # Wrapper for scipy.integrate.solve_ivp, or for the fixed-step integrators of geodpy.integrators. For the latter,
+    # max_step is the fixed step. With stream set to a file path, the interval is integrated in segments of length
+    # "chunk" which are appended to a .npy file, and the trajectory is then memory-mapped from that file.
+    # With dense_output, the interpolant of the solver is kept for resample(). Giving "samples" resamples right away.
+    # With renormalize set to N, the integration is restarted every N steps from the state projected back onto its
+    # initial norm gₘₖ uᵐ uᵏ (see Geodesics.renormalize()), which bounds the drift of looser tolerances.
+    # With checkpoint set to a file path, a streamed integration writes its state after every segment, from which
+    # resume() continues it if the process dies.
     def solve_trajectory(
         self,
         time_interval: tuple[float, float],
@@ -34,80 +105,401 @@ class Body:
         atol: float = 1e-8,
         rtol: float = 1e-8,
         events: Callable = None,
+        params: dict = None,
+        jacobian: bool = True,
+        fused: bool = True,
+        stream: str = None,
+        chunk: float = None,
+        dense_output: bool = False,
+        samples: int = None,
+        sampling: str = "s",
+        renormalize: int = None,
+        checkpoint: str = None,
     ) -> np.array:
 
-        self.solver_result = solve_ivp(
-            fun = Body.__diff_equations_system,
-            t_span = time_interval,
-            max_step = max_step,
-            y0 = np.append(self.pos[:,0], self.vel[:,0]),
-            method = method,
-            atol = atol,
-            rtol = rtol,
-            args=(self._geodesics._dₛuᵏ_lambda ,),
-            dense_output=False,
-            events=events
+        self.params = {} if params is None else params
+        param_values = self._geodesics.param_values(self.params)
+        assert fused or not self.__hamiltonian(), "HamiltonianGeodesics are only solved with the fused function."
+
+        dense_output = dense_output or samples is not None
+        assert not (dense_output and stream is not None), "Streamed trajectories cannot be resampled."
+        assert checkpoint is None or stream is not None, "Checkpoints require the trajectory to be streamed to a file."
+
+        y0 = self.__initial_state()
+        settings = {
+            "method"     : method,
+            "max_step"   : max_step,
+            "atol"       : atol,
+            "rtol"       : rtol,
+            "params"     : self.params,
+            "jacobian"   : jacobian,
+            "fused"      : fused,
+            "chunk"      : chunk,
+            "renormalize": renormalize,
+            "norm"       : None if renormalize is None else self._geodesics.norm()(y0, np.empty(1), *param_values)[0],
+        }
+        solve = self.__solver(settings, self.events if events is None else events, dense_output)
+
+        self.interpolant, self._interpolant_s = None, None
+        if stream is not None:
+            with TrajectoryStore(stream, 13 if self.__hamiltonian() else 9) as store:
+                self.__solve_streaming(solve, time_interval, y0, store, chunk, checkpoint, settings)
+            return self.load_trajectory(stream)
+
+        s, y, _ = solve(time_interval, y0)
+        self.trajectory = Trajectory.from_arrays(s, *self.__split_state(y), dtype=self.dtype)
+
+        # The result of scipy then shares the buffer instead of keeping a second copy of the points.
+        if self.solver_result is not None and not self.__hamiltonian():
+            self.solver_result.t, self.solver_result.y = self.trajectory.s, self.trajectory.state
+
+        if dense_output:
+            if self.solver_result is not None: self.interpolant = self.solver_result.sol
+            else: self.interpolant = self.__hermite_interpolant(s, y, param_values)
+            self._interpolant_s = s
+        if samples is not None: return self.resample(samples, sampling)
+
+        return self.s, self.pos, self.vel
+
+    # Replaces the solved points by points evenly spaced in interval ("s"), in coordinate time ("time") or in
+    # cartesian arc length ("arc_length"), evaluated with the interpolant of the solver. The step of the solver
+    # is thus only chosen for accuracy, while the plots and calculate_velocities() get smooth, evenly spaced points.
+    # The other modes are found on a grid refining every step of the solver "refine" times. The kwargs are given
+    # to the to_cartesian() method of the coordinates, for "arc_length".
+    def resample(self, points: int, mode: str = "s", refine: int = 8, **kwargs) -> np.array:
+        assert self.interpolant is not None, "The trajectory must be solved with dense_output=True to be resampled."
+        assert mode in Body.sampling_modes
+
+        knots = self._interpolant_s
+        if mode == "s":
+            s = np.linspace(knots[0], knots[-1], points)
+        else:
+            fine = (knots[:-1, None] + np.diff(knots)[:, None] * np.arange(refine) / refine).ravel()
+            fine = np.append(fine, knots[-1])
+            pos, vel, _ = self.__split_state(self.interpolant(fine))
+
+            if mode == "time":
+                q = pos[0]
+                assert np.all(np.diff(q) > 0), "Coordinate time must increase along the trajectory."
+            else:
+                cartesian = self._coordinates.to_cartesian(pos, **kwargs)
+                q = np.append(0, np.cumsum(np.linalg.norm(np.diff(cartesian[1:4], axis=1), axis=0)))
+
+            targets = np.linspace(q[0], q[-1], points)
+            s = np.interp(targets, q, fine)
+
+            # Newton's method on t(s) = target, with ∂ₛt = u⁰, corrects the linear interpolation.
+            if mode == "time":
+                for _ in range(2):
+                    pos, vel, _ = self.__split_state(self.interpolant(s))
+                    s = np.clip(s - (pos[0] - targets) / vel[0], knots[0], knots[-1])
+
+        self.trajectory = Trajectory.from_arrays(s, *self.__split_state(self.interpolant(s)), dtype=self.dtype)
+        return self.s, self.pos, self.vel
+
+    # Fixed-step methods have no interpolant of their own, so a cubic Hermite spline is built from the solved
+    # points and the derivatives of the system at these points.
+    def __hermite_interpolant(self, s: np.array, y: np.array, param_values: tuple) -> Callable:
+        derivatives = self._geodesics.rhs("numpy")(y, np.empty(y.shape), *param_values)
+        return CubicHermiteSpline(s, y, derivatives, axis=1)
+
+    # Continues a streamed integration from its last checkpoint, see solve_trajectory(). The points stored after the
+    # checkpoint are dropped and integrated again, and the new points are appended to the same file. The settings of
+    # the solver are read from the checkpoint, but the events, which cannot be stored, must be given again.
+    def resume(self, checkpoint: str, events: Callable = None) -> np.array:
+        state = read_checkpoint(checkpoint)
+        assert state["fingerprint"] == self.__fingerprint(), "The checkpoint was written for other geodesics."
+
+        settings = state["settings"]
+        self.params = settings["params"]
+        self.interpolant, self._interpolant_s = None, None
+
+        if not state["done"]:
+            solve = self.__solver(settings, self.events if events is None else events)
+            with TrajectoryStore.reopen(state["stream"], state["rows"]) as store:
+                self.__solve_streaming(solve, (state["s"], state["end"]), state["y"], store, settings["chunk"], checkpoint, settings)
+        return self.load_trajectory(state["stream"])
+
+    # Makes the solver described by the settings of solve_trajectory(), as stored in checkpoints.
+    def __solver(self, settings: dict, events: Callable, dense_output: bool = False) -> Callable:
+        param_values = self._geodesics.param_values(settings["params"])
+        method, max_step, atol, rtol = settings["method"], settings["max_step"], settings["atol"], settings["rtol"]
+
+        if method in fixed_step_methods: solve = self.__fixed_step_solver(method, max_step, atol, rtol, events, param_values)
+        else: solve = self.__solve_ivp_solver(method, max_step, atol, rtol, events, param_values, settings["jacobian"], settings["fused"], dense_output)
+
+        if settings["renormalize"] is not None: solve = self.__renormalized_solver(solve, settings["renormalize"], settings["norm"])
+        return solve
+
+    # Each solver is a function solve(interval, y0, steps=None) returning (s, y, stopped), where stopped is True if the
+    # integration ended before the end of the interval, because of a terminal event or of a failure. With steps, the
+    # integration also ends after this many steps, without being considered stopped.
+    def __solve_ivp_solver(self, method, max_step, atol, rtol, events, param_values, jacobian, fused, dense_output) -> Callable:
+        # Implicit solvers get the analytic jacobian instead of estimating it with finite differences.
+        # Explicit solvers warn if given a jacobian, so it is only passed when used.
+        use_jacobian = jacobian and method in Body.implicit_methods
+        jacobian_lambda = self._geodesics.jacobian() if use_jacobian else None
+        jacobian_kwargs = {"jac": Body.__jacobian_system} if use_jacobian else {}
+
+        # The fused function evaluates the whole system in one call instead of one call per component.
+        if fused: fun, equations = Body.__fused_equations_system, self._geodesics.rhs()
+        else:     fun, equations = Body.__diff_equations_system , self._geodesics._dₛuᵏ_lambda
+
+        def solve(time_interval: tuple[float, float], y0: np.array, steps: int = None) -> tuple[np.array, np.array, bool]:
+            solver_events = Body._events_without_args(events) or []
+            if steps is not None: solver_events.append(Body.__step_limit_event(steps))
+
+            self.solver_result = solve_ivp(
+                fun = fun,
+                t_span = time_interval,
+                max_step = max_step,
+                y0 = y0,
+                method = method,
+                atol = atol,
+                rtol = rtol,
+                args=(equations, jacobian_lambda, param_values),
+                dense_output=dense_output,
+                events=solver_events or None,
+                **jacobian_kwargs,
+            )
+
+            stopped = self.solver_result.status != 0
+            if steps is not None:
+                stopped = stopped and self.solver_result.t[-1] != solver_events[-1].mark
+                self.solver_result.t_events = self.solver_result.t_events[:-1]
+                self.solver_result.y_events = self.solver_result.y_events[:-1]
+            return self.solver_result.t, self.solver_result.y, stopped
+        return solve
+
+    # Integrates with a fixed step straight into a preallocated trajectory array.
+    def __fixed_step_solver(self, method, step, atol, rtol, events, param_values) -> Callable:
+        assert np.isfinite(step), "Fixed-step methods use max_step as their step, which must be finite."
+
+        rhs = self._geodesics.rhs()
+        jacobian = self._geodesics.jacobian() if method != "RK4" else None
+
+        def solve(time_interval: tuple[float, float], y0: np.array, steps: int = None) -> tuple[np.array, np.array, bool]:
+            total_steps = int(np.ceil((time_interval[1] - time_interval[0]) / step))
+            if steps is not None and steps < total_steps:
+                s = time_interval[0] + step * np.arange(steps + 1)
+            else:
+                s = np.linspace(time_interval[0], time_interval[1], total_steps + 1)
+            y = np.empty((8, len(s)))
+            y[:,0] = y0
+
+            points, status, message = fixed_step_methods[method](rhs, jacobian, s, y, param_values, Body._events_without_args(events) or [], atol, rtol)
+            if status == -1: warnings.warn(message, RuntimeWarning)
+            self.solver_result = None
+            return s[:points], y[:, :points], points < len(s)
+        return solve
+
+    # Wraps a solver so that it integrates N steps at a time, projecting the state back onto the norm of the initial
+    # state between each of them. The segments, and the results of scipy, are joined as if solved in one go.
+    def __renormalized_solver(self, solve: Callable, steps: int, norm: float) -> Callable:
+        assert steps > 0
+
+        def renormalized_solve(time_interval: tuple[float, float], y0: np.array) -> tuple[np.array, np.array, bool]:
+            s_start, s_end = time_interval
+            s_segments, y_segments, results = [], [], []
+            while True:
+                s, y, stopped = solve((s_start, s_end), y0, steps)
+                results.append(self.solver_result)
+
+                # The first point of a segment is the projected last point of the previous one, which it replaces.
+                first = 0 if not s_segments else 1
+                s_segments.append(s[first:])
+                y_segments.append(y[:, first:])
+
+                if stopped or s[-1] >= s_end: break
+                s_start, y0 = s[-1], self._geodesics.renormalize(y[:,-1].copy(), norm, self.params)
+                y_segments[-1][:,-1] = y0
+
+            if results[0] is not None: self.solver_result = Body.__join_results(results)
+            return np.concatenate(s_segments), np.concatenate(y_segments, axis=1), stopped
+        return renormalized_solve
+
+    # Terminal event of solve_ivp ending the integration after the given amount of steps. The solver evaluates the
+    # events once at the start and then once after every step. Once the count is reached, the event becomes s - mark,
+    # where mark is the end of the last step, whose root is found right away.
+    @staticmethod
+    def __step_limit_event(steps: int) -> Callable:
+        calls = 0
+        def step_limit_event(s, y, *args):
+            nonlocal calls
+            if step_limit_event.mark is None:
+                calls += 1
+                if calls > steps: step_limit_event.mark = s
+            return -1.0 if step_limit_event.mark is None else s - step_limit_event.mark
+        step_limit_event.mark = None
+        step_limit_event.terminal = True
+        return step_limit_event
+
+    # Joins the results of solve_ivp for consecutive segments of a trajectory, including their dense output.
+    @staticmethod
+    def __join_results(results: list[OdeResult]) -> OdeResult:
+        last = results[-1]
+        joined = OdeResult(
+            t = np.concatenate([results[0].t] + [result.t[1:] for result in results[1:]]),
+            y = np.concatenate([results[0].y] + [result.y[:, 1:] for result in results[1:]], axis=1),
+            sol = None,
+            t_events = None if last.t_events is None else [np.concatenate(t) for t in zip(*[result.t_events for result in results])],
+            y_events = None if last.y_events is None else [np.concatenate([np.reshape(y_k, (-1, last.y.shape[0])) for y_k in y]) for y in zip(*[result.y_events for result in results])],
+            nfev = sum(result.nfev for result in results),
+            njev = sum(result.njev for result in results),
+            nlu  = sum(result.nlu  for result in results),
+            status = last.status,
+            message = last.message,
+            success = last.success,
         )
+        if last.sol is not None:
+            ts = np.concatenate([results[0].sol.ts] + [result.sol.ts[1:] for result in results[1:]])
+            joined.sol = OdeSolution(ts, [interpolant for result in results for interpolant in result.sol.interpolants])
+        return joined
+
+    # Integrates segment by segment, appending each one to the store so that only one segment is held in memory. With
+    # a checkpoint path, the last state is then written to it with the settings of the solver, once the segment is
+    # safely stored, along with a fingerprint of the geodesics.
+    def __solve_streaming(self, solve: Callable, time_interval: tuple[float, float], y0: np.array, store: TrajectoryStore, chunk: float, checkpoint: str, settings: dict) -> None:
+        assert chunk is not None and chunk > 0, "Streaming requires the length of the segments, chunk."
+
+        s_start, s_end = time_interval
+        while True:
+            s_stop = min(s_start + chunk, s_end)
+            s, y, stopped = solve((s_start, s_stop), y0)
+
+            # The first point of a segment is the last point of the previous one.
+            first = 0 if store.rows == 0 else 1
+            pos, vel, mom = self.__split_state(y[:, first:])
+            store.append(np.vstack([s[first:], pos, vel] + ([mom] if mom is not None else [])))
 
-        self.s   = self.solver_result.t 
-        self.pos = self.solver_result.y[0:4]
-        self.vel = self.solver_result.y[4:8]
+            done = stopped or s_stop >= s_end
+            if checkpoint is not None:
+                write_checkpoint(checkpoint, {
+                    "fingerprint": self.__fingerprint(),
+                    "s"          : s[-1],
+                    "y"          : y[:,-1].copy(),
+                    "end"        : s_end,
+                    "done"       : done,
+                    "stream"     : os.path.abspath(store.path),
+                    "rows"       : store.rows,
+                    "settings"   : settings,
+                })
 
+            if done: break
+            s_start, y0 = s[-1], y[:,-1]
+
+    # Memory-maps a trajectory streamed to a file by solve_trajectory(). The points are only read from the disk
+    # when accessed.
+    def load_trajectory(self, path: str) -> np.array:
+        self.trajectory = Trajectory(TrajectoryStore.load(path))
         return self.s, self.pos, self.vel
 
+    # Identifies the geodesics a checkpoint was written for. The kind of geodesics matters since it sets the state.
+    def __fingerprint(self) -> str:
+        geodesics = self._geodesics
+        return GeodesicsCache.key(geodesics._coordinates, geodesics._gₘₖ, False, geodesics._params, type(geodesics).__name__)
+
+    def __hamiltonian(self) -> bool:
+        return isinstance(self._geodesics, HamiltonianGeodesics)
+
+    # State vector given to the solver : positions, then velocities or, for HamiltonianGeodesics, covariant momenta.
+    def __initial_state(self) -> np.array:
+        position, velocity = self._initial[0:4], self._initial[4:8]
+        if self.__hamiltonian(): return np.append(position, self._geodesics.momentum(position, velocity, self.params))
+        return self._initial.copy()
+
+    # Positions, velocities and, for HamiltonianGeodesics, covariant momenta (None otherwise) of solved states.
+    def __split_state(self, y: np.array) -> tuple[np.array, np.array, np.array]:
+        if self.__hamiltonian(): return y[0:4], self._geodesics.velocity(y[0:4], y[4:8], self.params), y[4:8]
+        return y[0:4], y[4:8], None
+
+    # scipy.integrate.solve_ivp gives the extra arguments of the system to the events as well. Events are instead
+    # wrapped so that they are only called with (s, y), keeping their "terminal" and "direction" attributes.
+    @staticmethod
+    def _events_without_args(events: Callable | list[Callable] | None) -> list[Callable] | None:
+        if events is None: return None
+        if callable(events): events = [events]
+
+        wrapped_events = []
+        for event in events:
+            def wrapped_event(s, y, *args, event=event):
+                return event(s, y)
+            wrapped_event.terminal  = getattr(event, "terminal", False)
+            wrapped_event.direction = getattr(event, "direction", 0)
+            wrapped_events.append(wrapped_event)
+        return wrapped_events
+
     # Function solved with scipy.integrate.solve_ivp
     @staticmethod
-    def __diff_equations_system(dτ, state, equations) -> tuple:
+    def __diff_equations_system(dτ, state, equations, jacobian, params) -> tuple:
         x0, x1, x2, x3, v0, v1, v2, v3  = state
 
-        a0 = equations[0](x0, x1, x2, x3, v0, v1, v2, v3)
-        a1 = equations[1](x0, x1, x2, x3, v0, v1, v2, v3)
-        a2 = equations[2](x0, x1, x2, x3, v0, v1, v2, v3)
-        a3 = equations[3](x0, x1, x2, x3, v0, v1, v2, v3)
+        a0 = equations[0](x0, x1, x2, x3, v0, v1, v2, v3, *params)
+        a1 = equations[1](x0, x1, x2, x3, v0, v1, v2, v3, *params)
+        a2 = equations[2](x0, x1, x2, x3, v0, v1, v2, v3, *params)
+        a3 = equations[3](x0, x1, x2, x3, v0, v1, v2, v3, *params)
         
         return v0, v1, v2, v3, a0, a1, a2, a3
 
-    # Calculates the norm of the velocity vector for each points as a function of coordinate time.
-    # This function assumes that self.pos[0] is time.
-    def calculate_velocities(self, **kwargs) -> np.array:
-        velocity_equation = self._coordinates.velocity_equation(**kwargs)
+    # Fused alternative to __diff_equations_system. A new output buffer is given on each call since the solver
+    # keeps references to previously returned derivatives.
+    @staticmethod
+    def __fused_equations_system(dτ, state, equations, jacobian, params) -> np.array:
+        return equations(state, np.empty(8), *params)
 
-        # Defining the arguments for the lambda velocity equation
-        symbolic_args = list(self._coordinates.coords)[1:4]
-        symbolic_args.extend([coord.diff(self._coordinates.interval) for coord in symbolic_args])
+    # Jacobian of the system solved with scipy.integrate.solve_ivp.
+    @staticmethod
+    def __jacobian_system(dτ, state, equations, jacobian, params) -> np.array:
+        return jacobian(state, np.empty((8, 8)), *params)
 
-        # Making a lambdified velocity equation
-        velocity2_equation = velocity_equation ** 2 # Necessary because lambda function doesn't like taking the sqrt of an expression.
-        velocity2_equation_lambda = lambdify(symbolic_args, velocity2_equation, ["numpy", "scipy"])
+    # Calculates the norm gₘₖ uᵐ uᵏ of the 4-velocity at every point of the trajectory, in a single vectorized call
+    # of Geodesics.norm(). Its drift from the initial value measures the error of the integration.
+    def calculate_norm(self) -> np.array:
+        state = np.vstack([self.pos, self.vel if self.mom is None else self.mom])
+        self.norm = self._geodesics.norm()(state, np.empty((1, state.shape[1])), *self._geodesics.param_values(self.params))[0]
+        return self.norm
 
-        t = self.pos[0]
+    # Calculates the norm of the velocity vector for each points as a function of coordinate time.
+    # This function assumes that self.pos[0] is time. The derivatives with respect to time are those of the integrated
+    # 4-velocities, with the chain rule dₜxⁱ = uⁱ/u⁰, so the whole trajectory is evaluated in one vectorized pass. Bodies
+    # without velocities, like the ones converted from a body without them, fall back to finite differences of the positions.
+    def calculate_velocities(self, **kwargs) -> np.array:
+        key = (self._coordinates, tuple(sorted(kwargs.items())))
+        if key not in Body._velocity_lambdas:
+            # Defining the arguments for the lambda velocity equation
+            symbolic_args = list(self._coordinates.coords)[1:4]
+            symbolic_args.extend([coord.diff(self._coordinates.interval) for coord in symbolic_args])
 
-        args = []
-        args.append(self.pos[1])
-        args.append(self.pos[2])
-        args.append(self.pos[3])
+            # Making a lambdified velocity equation
+            velocity2_equation = self._coordinates.velocity_equation(**kwargs) ** 2 # Necessary because lambda function doesn't like taking the sqrt of an expression.
+            Body._velocity_lambdas[key] = lambdify(symbolic_args, velocity2_equation, ["numpy", "scipy"])
 
-        # Taking derivative of position vector
-        for coord in range(3):
-            args.append(np.gradient(args[coord],t))
+        pos = np.asarray(self.pos, dtype=float)
+        if self.vel is not None:
+            vel = np.asarray(self.vel, dtype=float)
+            dₜxⁱ = vel[1:4] / vel[0]
+        else:
+            dₜxⁱ = [np.gradient(pos[coord], pos[0]) for coord in range(1, 4)]
 
-        self.vel_norm = velocity2_equation_lambda(*args)**(1/2) # Taking square root to undo the square of earlier.
+        self.vel_norm = Body._velocity_lambdas[key](*pos[1:4], *dₜxⁱ)**(1/2) # Taking square root to undo the square of earlier.
         return self.vel_norm
 
     # Creates a new Body object from the current body, but represented in cartesian coordinates.
     def get_cartesian_body(self, **kwargs):
-        new_body = Body(geodesics = None)
-        new_body._coordinates = Cartesian
-
-        new_body.s   = self.s
-        new_body.pos = self._coordinates.to_cartesian(self.pos, **kwargs)
-        return new_body
+        return self.get_body(Cartesian, **kwargs)
 
     # Creates a new Body object from the current body, but represented in spherical body coordinates.
     def get_spherical_body(self, **kwargs):
-        new_body = Body(geodesics = None)
-        new_body._coordinates = Spherical
+        return self.get_body(Spherical, **kwargs)
 
-        new_body.s   = self.s
-        new_body.pos = self._coordinates.to_spherical(self.pos, **kwargs)
+    # Creates a new Body object from the current body, represented in any coordinate system. The positions, and the
+    # velocities if the body has some, are converted in one pass (see Coordinates.convert()), and stored with the
+    # interval in a buffer of the same precision. The kwargs are the parameters of the transforms, e.g. a=0.5.
+    def get_body(self, coordinates: Coordinates, **kwargs):
+        new_body = Body(geodesics = None, dtype = self.dtype)
+        new_body._coordinates = coordinates
+        if self.vel is None:
+            new_body.trajectory = Trajectory.from_arrays(self.s, self._coordinates.convert(coordinates, self.pos, **kwargs), dtype=self.trajectory.dtype)
+        else:
+            new_body.trajectory = Trajectory.from_arrays(self.s, *self._coordinates.convert(coordinates, self.pos, self.vel, **kwargs), dtype=self.trajectory.dtype)
         return new_body
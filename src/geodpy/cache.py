@@ -0,0 +1,125 @@
+from .coordinates import Coordinates
+from .to_lambda import lambda_source, source_to_lambda, jit_lambda
+
+from typing import Callable
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+
+from sympy import *
+
+### GeodesicsCache class ###
+# Persistent on-disk cache of derived geodesics equations. Each entry holds symbolic equations (e.g. the acceleration
+# vector or its jacobian) and the generated source of their lambda functions, and is keyed by a fingerprint of the
+# metric, the coordinate system, the simplify flag, the free parameters and the kind of equations. The code compiled by
+# numba for an entry is kept in the folder "jit/<key>", so that both are evicted and invalidated together. Least
+# recently used entries are evicted once the cache exceeds its size limit, JIT artefacts included.
+class GeodesicsCache:
+    version: int = 3
+
+    def __init__(self, directory: str = None, max_size: int = 256 * 2**20) -> None:
+        if directory is None: directory = GeodesicsCache.default_directory()
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def default_directory() -> str:
+        return os.environ.get("GEODPY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "geodpy"))
+
+    # Canonical fingerprint of a metric expressed in a coordinate system.
+    # The kind distinguishes the different equations derived from a same metric, e.g. "acceleration" or "jacobian".
+    @staticmethod
+    def key(coordinates: Coordinates, gₘₖ: Matrix, simplify: bool = False, params: tuple[Symbol] = (), kind: str = "acceleration") -> str:
+        fingerprint = "|".join([srepr(gₘₖ), f"{coordinates.__module__}.{coordinates.__qualname__}", str(bool(simplify)), srepr(tuple(params)), kind])
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _jit_path(self, key: str) -> str:
+        return os.path.join(self.directory, "jit", key)
+
+    # Returns the symbolic expressions and their lambda functions, or None if the entry is missing or unreadable.
+    def load(self, key: str) -> tuple[Array, list[Callable]] | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.invalidate(key)
+            return None
+
+        if entry.get("version") != GeodesicsCache.version:
+            self.invalidate(key)
+            return None
+
+        os.utime(path) # Marks the entry as recently used.
+        return entry["expressions"], [source_to_lambda(source) for source in entry["sources"]]
+
+    def store(self, key: str, expressions: Array, lambda_functions: list[Callable]) -> None:
+        entry = {
+            "version"    : GeodesicsCache.version,
+            "expressions": expressions,
+            "sources"    : [lambda_source(function) for function in lambda_functions],
+        }
+
+        # Written to a temporary file first so that concurrent readers never see a partial entry.
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            pickle.dump(entry, file)
+        os.replace(temporary_path, self._path(key))
+
+        self.evict()
+
+    # JIT-compiles a generated function with numba (see to_lambda.jit_lambda()) in the folder of the entry of the key,
+    # which is marked as recently used. The compiled code is written there by numba on the first call of the function.
+    def jit(self, key: str, function: Callable) -> Callable:
+        directory = self._jit_path(key)
+        function = jit_lambda(function, directory)
+        if os.path.isdir(directory):
+            os.utime(directory)
+            self.evict()
+        return function
+
+    # Removes the least recently used entries until the cache fits within max_size. The size of an entry is the one of
+    # its pickle and of its JIT artefacts, and it was last used when either of them was.
+    def evict(self) -> None:
+        entries: dict[str, list[float]] = {}
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".pkl"):
+                continue
+            stat = os.stat(os.path.join(self.directory, file_name))
+            entries[file_name[:-4]] = [stat.st_mtime, stat.st_size]
+
+        jit_directory = os.path.join(self.directory, "jit")
+        for key in (os.listdir(jit_directory) if os.path.isdir(jit_directory) else []):
+            path = self._jit_path(key)
+            entry = entries.setdefault(key, [0, 0])
+            entry[0] = max(entry[0], os.stat(path).st_mtime)
+            for root, _, file_names in os.walk(path):
+                entry[1] += sum(os.path.getsize(os.path.join(root, file_name)) for file_name in file_names)
+
+        size = sum(entry_size for _, entry_size in entries.values())
+        for _, entry_size, key in sorted((mtime, entry_size, key) for key, (mtime, entry_size) in entries.items()):
+            if size <= self.max_size:
+                break
+            self.invalidate(key)
+            size -= entry_size
+
+    def invalidate(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self._jit_path(key), ignore_errors=True)
+
+    def clear(self) -> None:
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(".pkl"):
+                self.invalidate(file_name[:-4])
+        shutil.rmtree(os.path.join(self.directory, "jit"), ignore_errors=True)
@@ -0,0 +1,81 @@
+from .coordinates import Coordinates
+from .metric import inverse_metric
+
+from sympy import *
+
+### Christoffel class ###
+# Class that computes and stores the Christoffel symbols of the second kind Γᵏₘₙ of a metric. Only the independent
+# (m≤n) index pairs are calculated, since Γᵏₘₙ = Γᵏₙₘ, and every term built from a metric derivative that is
+# identically zero is skipped. The derivation cost thus scales with the amount of nonzero entries in the metric.
+class Christoffel:
+
+    def __init__(self, coordinates: Coordinates, gₘₖ: Matrix, gᵐᵏ_: Matrix = None):
+        assert gₘₖ.shape[0] == len(coordinates.coords)
+
+        self._coordinates = coordinates
+        self._gₘₖ = gₘₖ
+        self._gᵐᵏ_ = inverse_metric(gₘₖ) if gᵐᵏ_ is None else gᵐᵏ_
+        self._dim = gₘₖ.shape[0]
+
+        self._Γᵏₘₙ: dict[tuple[int, int, int], Expr] = self.__second_kind(self.__first_kind(self.__metric_derivatives()))
+
+    # Nonzero metric derivatives ∂ₗgₘₙ, only for m≤n.
+    def __metric_derivatives(self) -> dict[tuple[int, int, int], Expr]:
+        dₗgₘₙ: dict[tuple[int, int, int], Expr] = {}
+        for m in range(self._dim):
+            for n in range(m, self._dim):
+                gₘₙ = self._gₘₖ[m, n]
+                if gₘₙ == 0 or not gₘₙ.has(*self._coordinates.coords):
+                    continue
+                for l, coord in enumerate(self._coordinates.coords):
+                    derivative = gₘₙ.diff(coord)
+                    if derivative != 0:
+                        dₗgₘₙ[l, m, n] = derivative
+        return dₗgₘₙ
+
+    # Christoffel symbols of the first kind : Γₗₘₙ = 1/2 * (∂ₘgₗₙ + ∂ₙgₗₘ - ∂ₗgₘₙ), only for m≤n.
+    def __first_kind(self, dₗgₘₙ: dict[tuple[int, int, int], Expr]) -> dict[tuple[int, int, int], Expr]:
+        def d(l: int, m: int, n: int) -> Expr:
+            return dₗgₘₙ.get((l, min(m, n), max(m, n)), S.Zero)
+
+        Γₗₘₙ: dict[tuple[int, int, int], Expr] = {}
+        for l in range(self._dim):
+            for m in range(self._dim):
+                for n in range(m, self._dim):
+                    term = d(m, l, n) + d(n, l, m) - d(l, m, n)
+                    if term != 0:
+                        Γₗₘₙ[l, m, n] = term / 2
+        return Γₗₘₙ
+
+    # Christoffel symbols of the second kind : Γᵏₘₙ = gᵏˡ * Γₗₘₙ, only for m≤n.
+    def __second_kind(self, Γₗₘₙ: dict[tuple[int, int, int], Expr]) -> dict[tuple[int, int, int], Expr]:
+        Γᵏₘₙ: dict[tuple[int, int, int], Expr] = {}
+        for k in range(self._dim):
+            for (l, m, n), Γ in Γₗₘₙ.items():
+                gᵏˡ = self._gᵐᵏ_[k, l]
+                if gᵏˡ == 0:
+                    continue
+                Γᵏₘₙ[k, m, n] = Γᵏₘₙ.get((k, m, n), S.Zero) + gᵏˡ * Γ
+        return {index: Γ for index, Γ in Γᵏₘₙ.items() if Γ != 0}
+
+    def __getitem__(self, index: tuple[int, int, int]) -> Expr:
+        k, m, n = index
+        return self._Γᵏₘₙ.get((k, min(m, n), max(m, n)), S.Zero)
+
+    # Independent nonzero symbols, indexed by (k, m, n) with m≤n.
+    @property
+    def nonzero(self) -> dict[tuple[int, int, int], Expr]:
+        return self._Γᵏₘₙ
+
+    # Full rank 3 array of the symbols, indexed as [k, m, n].
+    def to_array(self) -> Array:
+        return Array([[[self[k, m, n] for n in range(self._dim)] for m in range(self._dim)] for k in range(self._dim)])
+
+    # Geodesic equation : ∂ₛuᵏ = -Γᵏₘₙ * uᵐ uⁿ where uᵏ = ∂ₛxᵏ
+    def acceleration(self) -> Array:
+        uᵐ = [coord.diff(self._coordinates.interval) for coord in self._coordinates.coords]
+        dₛuᵏ: list[Expr] = [S.Zero] * self._dim
+        for (k, m, n), Γ in self._Γᵏₘₙ.items():
+            multiplicity = 1 if m == n else 2
+            dₛuᵏ[k] -= multiplicity * Γ * uᵐ[m] * uᵐ[n]
+        return Array(dₛuᵏ)
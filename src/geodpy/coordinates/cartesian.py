@@ -15,16 +15,12 @@ class Cartesian(Coordinates):
     
     @classmethod
     def velocity_equation(cls, **kwargs) -> Function:
-        return (cls.x.diff(cls.interval)**2 + cls.y.diff(interval)**2 + cls.z.diff(cls.interval)**2)**(1/2)
+        return (cls.x.diff(cls.interval)**2 + cls.y.diff(cls.interval)**2 + cls.z.diff(cls.interval)**2)**(1/2)
 
-    def to_cartesian(pos: np.array, **kwargs) -> np.array:
-        return pos
-
-    def to_spherical(pos: np.array, **kwargs) -> np.array:
-        x, y, z = pos[1:4]
-
-        r = np.sqrt(x*x + y*y + z*z) 
-        θ = np.arctan(np.sqrt(x*x + y*y)/z)
-        φ = np.arctan(y/x)
+    @classmethod
+    def cartesian_expressions(cls) -> tuple[Expr]:
+        return cls.coords
 
-        return np.array([pos[0], r, θ, φ])
+    @classmethod
+    def from_cartesian_expressions(cls) -> tuple[Expr]:
+        return cls.coords
@@ -1,12 +1,18 @@
 import numpy as np
 from abc import ABCMeta, abstractmethod
 
+from . import transforms
+
 # Possible symbols
 #t,r,a,b,c,θ,φ,η,ψ,x,y 
 
 ### Coordinates abstract class ###
 # This abstract class is the base template for all coordinate systems implemented as classes.
+# Conversions are generated from the symbolic transforms of the classes, see transforms.py. Parameters of the
+# transforms are listed in transform_params with their default value, e.g. {a: 0} for OblongEllipsoid.
 class Coordinates(metaclass=ABCMeta):
+    transform_params: dict = {}
+
     @property
     @abstractmethod
     def interval():
@@ -26,10 +32,34 @@ class Coordinates(metaclass=ABCMeta):
     def velocity_equation(cls, **kwargs):
         pass
 
+    # (t, x, y, z) as expressions of the coordinates.
+    @classmethod
     @abstractmethod
-    def to_cartesian(pos: np.array, **kwargs):
+    def cartesian_expressions(cls) -> tuple:
         pass
 
-    @abstractmethod
-    def to_spherical(pos: np.array, **kwargs):
-        pass
+    # Coordinates as expressions of the ones of Cartesian, or None if the system can only be converted from.
+    @classmethod
+    def from_cartesian_expressions(cls) -> tuple:
+        return None
+
+    # Direct expressions of the coordinates of "target", which replace the composition through cartesian coordinates,
+    # or None. Systems sharing their angles declare them, so that φ is kept as is instead of being wrapped by atan2.
+    @classmethod
+    def shortcut_expressions(cls, target: type) -> tuple:
+        return None
+
+    # Converts (4, N) positions, and the velocities at these positions if given, to the "target" coordinate system.
+    @classmethod
+    def convert(cls, target: type, pos: np.array, vel: np.array = None, **kwargs) -> np.array:
+        return transforms.convert(cls, target, pos, vel, **kwargs)
+
+    @classmethod
+    def to_cartesian(cls, pos: np.array, vel: np.array = None, **kwargs) -> np.array:
+        from .cartesian import Cartesian
+        return cls.convert(Cartesian, pos, vel, **kwargs)
+
+    @classmethod
+    def to_spherical(cls, pos: np.array, vel: np.array = None, **kwargs) -> np.array:
+        from .spherical import Spherical
+        return cls.convert(Spherical, pos, vel, **kwargs)
@@ -11,39 +11,37 @@ class Lemaitre(Coordinates):
     coords: tuple[Function]     = (Function('T')(interval), Function('ρ')(interval), Function('θ')(interval), Function('φ')(interval))
     coords_string: tuple[str]   = ('T', 'ρ', 'θ', 'φ')
     T, ρ, θ, φ                  = coords
+    rs: Symbol                  = symbols('rs')
+    transform_params: dict      = {rs: 1}
 
     @classmethod
     def velocity_equation(cls, **kwargs) -> Function:
         rs = kwargs.get('rs',1)
         raise NotImplementedError
 
-    def to_cartesian(pos: np.array, **kwargs) -> np.array:
-        rs = kwargs.get('rs',1)
-
-        T, ρ, θ, φ = pos
-
-        sinθ = np.sin(θ)
-        r = (3/2 * (ρ - T))**(2/3) * rs**(1/3)
-
-        cst = 3 * (4*rs*rs/9 * (ρ[0] - T[0]))**(1/3) + rs * (np.log(np.abs( (3/(2*rs) * (ρ[0] - T[0]))**(1/3) - 1 )) - np.log(np.abs( (3/(2*rs) * (ρ[0] - T[0]))**(1/3) + 1 )) )
-        t = T - 3 * (4*rs*rs/9 * (ρ - T))**(1/3) - rs * (np.log(np.abs( (3/(2*rs) * (ρ - T))**(1/3) - 1 )) - np.log(np.abs( (3/(2*rs) * (ρ - T))**(1/3) + 1 )) ) + cst
-        x = r * sinθ * np.cos(φ)
-        y = r * sinθ * np.sin(φ)
-        z = r * np.cos(θ)
-
-        return np.array([t, x, y, z])
-
-    def to_spherical(pos: np.array, **kwargs) -> np.array:
-        rs = kwargs.get('rs',1)
-
-        T, ρ, θ = pos[0:3]
-
-        sinθ = np.sin(θ)
+    # r = (3/2 (ρ - T))^(2/3) rs^(1/3), and t = T - 2√(rs r) - rs ln|(√(r/rs) - 1)/(√(r/rs) + 1)| up to a constant.
+    # Lemaitre coordinates are only converted from, since the inverse transform needs the origin of t.
+    @classmethod
+    def cartesian_expressions(cls) -> tuple[Expr]:
+        rs = Lemaitre.rs
+        u = (3/(2*rs) * (cls.ρ - cls.T))**Rational(1, 3)
+        r = (Rational(3, 2) * (cls.ρ - cls.T))**Rational(2, 3) * rs**Rational(1, 3)
+        t = cls.T - 3 * (4*rs*rs/9 * (cls.ρ - cls.T))**Rational(1, 3) - rs * log(((u - 1)/(u + 1))**2) / 2 # ln|w| = ln(w²)/2, whose derivative is free of re() and im().
+        return (t, r * sin(cls.θ) * cos(cls.φ), r * sin(cls.θ) * sin(cls.φ), r * cos(cls.θ))
 
-        cst = 3 * (4*rs*rs/9 * (ρ[0] - T[0]))**(1/3) + rs * (np.log(np.abs( (3/(2*rs) * (ρ[0] - T[0]))**(1/3) - 1 )) - np.log(np.abs( (3/(2*rs) * (ρ[0] - T[0]))**(1/3) + 1 )) )
-        t = T - 3 * (4*rs*rs/9 * (ρ - T))**(1/3) - rs * (np.log(np.abs( (3/(2*rs) * (ρ - T))**(1/3) - 1 )) - np.log(np.abs( (3/(2*rs) * (ρ - T))**(1/3) + 1 )) ) + cst
-        r = (3/2 * (ρ - T))**(2/3) * rs**(1/3)
+    @classmethod
+    def shortcut_expressions(cls, target: type) -> tuple[Expr]:
+        from .spherical import Spherical
+        if target is not Spherical: return None
 
-        return np.array([t, r, pos[2], pos[3]])
+        return (cls.cartesian_expressions()[0], (Rational(3, 2) * (cls.ρ - cls.T))**Rational(2, 3) * Lemaitre.rs**Rational(1, 3), cls.θ, cls.φ)
 
+    # The constant of t is chosen so that t = T at the first point, as the body starts at the same time in both.
+    @classmethod
+    def convert(cls, target: type, pos: np.array, vel: np.array = None, **kwargs) -> np.array:
+        converted = super().convert(target, pos, vel, **kwargs)
+        if target is Lemaitre: return converted
 
+        new_pos = converted if vel is None else converted[0]
+        new_pos[0] += np.asarray(pos, dtype=float)[0].flat[0] - new_pos[0].flat[0]
+        return converted
@@ -10,34 +10,42 @@ class OblongEllipsoid(Coordinates):
     coords: tuple[Function]     = (Function('t')(interval), Function('r')(interval), Function('θ')(interval), Function('φ')(interval))
     coords_string: tuple[str]   = ('t', 'r', 'θ', 'φ')
     t, r, θ, φ                  = coords
+    a: Symbol                   = symbols('a')
+    transform_params: dict      = {a: 0}
 
     @classmethod
     def velocity_equation(cls, **kwargs) -> Function:
         a = kwargs.get('a',0)
         return ( cls.r.diff(cls.interval)**2 * (sin(cls.θ)**2 * cls.r**2/(cls.r**2 + a**2) + cos(cls.θ)**2) + cls.r**2 * cls.θ.diff(cls.interval)**2 + cls.r**2 * cls.φ.diff(cls.interval)**2 * sin(cls.θ)**2 + a**2 * (cls.θ.diff(cls.interval)**2 * cos(cls.θ)**2 + cls.φ.diff(cls.interval)**2 * sin(cls.θ)**2) )**(1/2)
 
-    def to_cartesian(pos: np.array, **kwargs) -> np.array:
-        a = kwargs.get('a',0)
-
-        r, θ, φ = pos[1:4]
-
-        sinθ = np.sin(θ)
-
-        x = np.sqrt(r*r + a*a) * sinθ * np.cos(φ)
-        y = np.sqrt(r*r + a*a) * sinθ * np.sin(φ)
-        z = r * np.cos(θ)
-
-        return np.array([pos[0], x, y, z])
-
-    def to_spherical(pos: np.array, **kwargs) -> np.array:
-        a = kwargs.get('a',0)
-
-        r, θ = pos[1:3]
-
-        sinθ = np.sin(θ)
-
-        r_sp = np.sqrt(r*r + a*a*sinθ*sinθ)
-        θ_sp = np.arctan(np.sqrt(1+a*a/(r*r))*np.tan(θ))
+    @classmethod
+    def cartesian_expressions(cls) -> tuple[Expr]:
+        a = OblongEllipsoid.a
+        x = sqrt(cls.r**2 + a**2) * sin(cls.θ) * cos(cls.φ)
+        y = sqrt(cls.r**2 + a**2) * sin(cls.θ) * sin(cls.φ)
+        z = cls.r * cos(cls.θ)
+        return (cls.t, x, y, z)
+
+    # r is the positive root of r⁴ - (x² + y² + z² - a²) r² - a² z² = 0. The angles are found with atan2, which
+    # gives the right quadrant, θ in [0, π] and φ in ]-π, π].
+    @classmethod
+    def from_cartesian_expressions(cls) -> tuple[Expr]:
+        from .cartesian import Cartesian
+        a = OblongEllipsoid.a
+        t, x, y, z = Cartesian.coords
 
-        return np.array([pos[0], r_sp, θ_sp, pos[3]])
+        b = x**2 + y**2 + z**2 - a**2
+        r = sqrt((b + sqrt(b**2 + 4*a**2*z**2)) / 2)
+        θ = atan2(r * sqrt(x**2 + y**2), z * sqrt(r**2 + a**2))
+        φ = atan2(y, x)
+        return (t, r, θ, φ)
 
+    @classmethod
+    def shortcut_expressions(cls, target: type) -> tuple[Expr]:
+        from .spherical import Spherical
+        if target is not Spherical: return None
+
+        a = OblongEllipsoid.a
+        r = sqrt(cls.r**2 + a**2 * sin(cls.θ)**2)
+        θ = atan2(sqrt(cls.r**2 + a**2) * sin(cls.θ), cls.r * cos(cls.θ))
+        return (cls.t, r, θ, cls.φ)
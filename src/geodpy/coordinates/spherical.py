@@ -8,13 +8,18 @@ from sympy import *
 # Spherical representation of space-time, used in the Schwarzschild metric example. This is a special case
 # of the Oblong Ellipsoid reprensentation when a = 0, "a" being the rotation speed of a blackhole in the Kerr metric.
 class Spherical(OblongEllipsoid):
+    transform_params: dict = {}
 
     @classmethod
     def velocity_equation(cls, **kwargs) -> Function:
         return simplify(super(Spherical, Spherical).velocity_equation(a=0))
 
-    def to_cartesian(pos: np.array, **kwargs) -> np.array:
-        return super(Spherical, Spherical).to_cartesian(pos, a=0)
+    @classmethod
+    def cartesian_expressions(cls) -> tuple[Expr]:
+        return (cls.t, cls.r * sin(cls.θ) * cos(cls.φ), cls.r * sin(cls.θ) * sin(cls.φ), cls.r * cos(cls.θ))
 
-    def to_spherical(pos: np.array, **kwargs) -> np.array:
-        return pos
+    @classmethod
+    def from_cartesian_expressions(cls) -> tuple[Expr]:
+        from .cartesian import Cartesian
+        t, x, y, z = Cartesian.coords
+        return (t, sqrt(x**2 + y**2 + z**2), atan2(sqrt(x**2 + y**2), z), atan2(y, x))
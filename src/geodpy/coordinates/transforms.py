@@ -0,0 +1,62 @@
+from typing import Callable
+
+import numpy as np
+from sympy import *
+
+### Coordinate transforms ###
+# Conversions between any two coordinate systems, generated from the symbolic transforms declared by the classes :
+# cartesian_expressions() gives (t, x, y, z) as expressions of the coordinates of a system, and, when the system can
+# be reached from cartesian coordinates, from_cartesian_expressions() gives its coordinates as expressions of the ones
+# of Cartesian. A conversion from A to B is the composition of both, so that every pair of systems is covered without
+# writing its formulas by hand. The velocities ∂ₛxᵏ are converted by the derivative of the same expressions along the
+# interval, i.e. with the jacobian of the transform, in the same pass as the positions. Every conversion is one
+# function generated with the common subexpressions eliminated (see fused_system_to_lambda()), evaluated on whole
+# (4, N) or (8, N) arrays at once. It is generated once per pair of systems, and the parameters of the transforms,
+# e.g. "a" for OblongEllipsoid, are given to it as arguments, so it is reused for any value of them.
+
+_converters: dict[tuple, tuple[Callable, tuple[Symbol]]] = {}
+
+# Symbolic expressions of the coordinates of "target" as functions of the coordinates of "source".
+def transform_expressions(source: type, target: type) -> list[Expr]:
+    from .cartesian import Cartesian
+
+    if source is target: return list(source.coords)
+    if target is Cartesian: return list(source.cartesian_expressions())
+    if source.shortcut_expressions(target) is not None: return list(source.shortcut_expressions(target))
+
+    from_cartesian = target.from_cartesian_expressions()
+    assert from_cartesian is not None, f"{target.__name__} coordinates can not be converted to."
+    if source is Cartesian: return list(from_cartesian)
+
+    # Simultaneous substitution, since systems share some coordinates, e.g. t(s) or θ(s).
+    cartesian = dict(zip(Cartesian.coords, source.cartesian_expressions()))
+    return [expr.xreplace(cartesian) for expr in from_cartesian]
+
+# Generated function f(y, out, *params) converting positions, or positions and velocities, from source to target,
+# with the parameters of both transforms, sorted by name.
+def converter(source: type, target: type, velocities: bool = False) -> tuple[Callable, tuple[Symbol]]:
+    key = (source, target, velocities)
+    if key in _converters: return _converters[key]
+
+    from ..to_lambda import fused_system_to_lambda # Imported here, since to_lambda imports the coordinates.
+
+    expressions = transform_expressions(source, target)
+    if velocities: expressions += [expr.diff(source.interval) for expr in expressions]
+    params = tuple(sorted({*source.transform_params, *target.transform_params}, key=str))
+
+    _converters[key] = (fused_system_to_lambda(source, expressions, params, "numpy"), params)
+    return _converters[key]
+
+# Converts (4, N) positions, and optionally the (4, N) velocities at these positions, from source to target. The
+# kwargs are the parameters of the transforms, which take their default value when they are not given.
+def convert(source: type, target: type, pos: np.array, vel: np.array = None, **kwargs) -> np.array:
+    function, params = converter(source, target, vel is not None)
+    defaults = {**target.transform_params, **source.transform_params}
+    param_values = [kwargs.get(str(param), defaults[param]) for param in params]
+
+    pos = np.asarray(pos, dtype=float)
+    if vel is None: return function(pos, np.empty(pos.shape), *param_values)
+
+    y = np.concatenate([pos, np.asarray(vel, dtype=float)])
+    y = function(y, np.empty(y.shape), *param_values)
+    return y[0:4], y[4:8]
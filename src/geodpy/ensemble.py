@@ -0,0 +1,216 @@
+from typing import Callable
+
+from .geodesics import Geodesics
+from .hamiltonian import HamiltonianGeodesics
+from .body import Body
+from .trajectory import Trajectory
+
+from scipy.integrate import RK23, RK45, DOP853, Radau, BDF, LSODA
+from scipy.integrate._ivp.ivp import OdeResult
+from scipy.sparse import coo_matrix
+import numpy as np
+
+### Ensemble class ###
+# Class responsible for solving the trajectories of many bodies in the same metric with a single solver. The states
+# of all the bodies are stored in a (8, N) array and the geodesics equations are evaluated once per step for all of
+# them. The events are checked for every body after each step, with their "terminal" and "direction" attributes like
+# in solve_ivp, and located on the interpolant of the step. A terminal event retires the body it occurred for, while the
+# others keep going, and the other events are recorded per body, like the t_events and y_events of solve_ivp.
+# Like Body, HamiltonianGeodesics are solved for the covariant momenta, which the events then receive in y[4:8].
+class Ensemble:
+    solvers: dict[str, type] = {solver.__name__: solver for solver in (RK23, RK45, DOP853, Radau, BDF, LSODA)}
+
+    def __init__(self, geodesics: Geodesics, position_vecs: np.array, velocity_vecs: np.array) -> None:
+        self._geodesics   = geodesics
+        self._coordinates = geodesics._coordinates
+
+        position_vecs = np.asarray(position_vecs, dtype=float)
+        velocity_vecs = np.asarray(velocity_vecs, dtype=float)
+        assert position_vecs.shape == velocity_vecs.shape and position_vecs.shape[0] == 4
+
+        self.state = np.concatenate([position_vecs, velocity_vecs])
+        self.size  = self.state.shape[1]
+        self.params = {}
+
+        self.retired_at    = np.full(self.size, np.nan) # Interval at which each body was retired, nan if never.
+        self.retired_by    = np.full(self.size, -1)     # Index of the event which retired each body, -1 if never.
+        self.s_events: list[list[np.array]] = [[] for _ in range(self.size)] # Per body and per event, like t_events.
+        self.y_events: list[list[np.array]] = [[] for _ in range(self.size)] # Per body and per event, (k, 8) states.
+        self.solver_results = []
+
+        self._s: list[list[np.array]] = [[] for _ in range(self.size)]
+        self._y: list[list[np.array]] = [[] for _ in range(self.size)]
+
+    # Solves all the trajectories. Each event is a function event(s, y) of the interval and of the (8, n) states of the
+    # active bodies returning one value per body. Functions written for a single Body, like lambda s, y: y[1] - rs,
+    # therefore work unchanged. Events without the "terminal" attribute are terminal, so that a plain function retires
+    # the bodies, and events without the "direction" attribute trigger in both directions.
+    def solve_trajectory(
+        self,
+        time_interval: tuple[float, float],
+        method: str = "RK45",
+        max_step: float = np.inf,
+        atol: float = 1e-8,
+        rtol: float = 1e-8,
+        events: list[Callable] = None,
+        params: dict = None,
+    ) -> list[Body]:
+
+        assert method in Ensemble.solvers, f"The method must be one of {tuple(Ensemble.solvers)}."
+        self.params = {} if params is None else params
+        param_values = self._geodesics.param_values(self.params)
+        events = [] if events is None else list(events)
+        terminal  = np.array([bool(getattr(event, "terminal", True)) for event in events], dtype=bool)
+        direction = np.array([getattr(event, "direction", 0) for event in events], dtype=float)
+        event_s = [[[] for _ in events] for _ in range(self.size)]
+        event_y = [[[] for _ in events] for _ in range(self.size)]
+
+        rhs = self._geodesics.rhs("numpy")
+        jacobian = self._geodesics.jacobian("numpy") if method in Body.implicit_methods else None
+
+        s_start, s_end = time_interval
+        active = np.arange(self.size)
+        state  = self.state.copy()
+        if isinstance(self._geodesics, HamiltonianGeodesics):
+            state[4:8] = self._geodesics.momentum(state[0:4], state[4:8], self.params)
+
+        # Bodies already past a terminal event are retired before integrating.
+        active, state = self.__retire(s_start, active, state, events, terminal, direction)
+
+        while active.size > 0 and s_start < s_end:
+            n = active.size
+
+            def fun(s, y):
+                return rhs(y.reshape(8, n), np.empty((8, n)), *param_values).ravel()
+
+            jacobian_kwargs = {"jac": self.__block_jacobian(jacobian, n, param_values)} if jacobian is not None else {}
+            solver = Ensemble.solvers[method](fun, s_start, state.ravel(), s_end, max_step=max_step, atol=atol, rtol=rtol, **jacobian_kwargs)
+
+            s_points, y_points = [s_start], [state]
+            values = self.__values(s_start, state, events)
+            status, message, retired = 0, "The solver successfully reached the end of the integration interval.", np.zeros(n, dtype=bool)
+            while solver.status == "running":
+                step_message = solver.step()
+                if solver.status == "failed":
+                    status, message = -1, step_message
+                    break
+
+                s_new, y_new = solver.t, solver.y.reshape(8, n)
+                new_values = self.__values(s_new, y_new, events)
+                up, down = (values <= 0) & (new_values >= 0), (values >= 0) & (new_values <= 0)
+                crossed = (up & (direction[:, None] > 0)) | (down & (direction[:, None] < 0)) | ((up | down) & (direction[:, None] == 0))
+
+                if np.any(crossed):
+                    dense = solver.dense_output()
+                    roots = self.__locate(dense, events, crossed, solver.t_old, s_new, n)
+                    terminal_roots = np.where(crossed & terminal[:, None], roots, np.inf)
+                    s_stop = np.min(terminal_roots)
+
+                    # Only the events up to the first terminal one happened, since the step is cut there.
+                    for k, i in zip(*np.nonzero(crossed & (roots <= s_stop))):
+                        event_s[active[i]][k].append(roots[k, i])
+                        event_y[active[i]][k].append(dense(roots[k, i]).reshape(8, n)[:, i])
+
+                    if np.isfinite(s_stop):
+                        stopping = terminal_roots == s_stop
+                        retired = np.any(stopping, axis=0)
+                        self.retired_at[active[retired]] = s_stop
+                        self.retired_by[active[retired]] = np.argmax(stopping[:, retired], axis=0)
+                        s_new, y_new = s_stop, dense(s_stop).reshape(8, n)
+                        status, message = 1, "A termination event occurred."
+
+                s_points.append(s_new)
+                y_points.append(y_new)
+                values = new_values
+                if status == 1: break
+
+            ys = np.stack(y_points, axis=-1)
+            result = OdeResult(t=np.array(s_points), y=ys.reshape(8*n, -1), status=status, message=message, success=status >= 0, nfev=solver.nfev, njev=solver.njev, nlu=solver.nlu)
+            self.solver_results.append(result)
+            for i, body in enumerate(active):
+                self._s[body].append(result.t)
+                self._y[body].append(ys[:, i, :])
+
+            if status != 1: break # Reached the end of the interval or failed.
+
+            s_start = result.t[-1]
+            active, state = active[~retired], ys[:, ~retired, -1]
+
+            # Removes the last point of the bodies still active, since it is the first point of the next segment.
+            for body in active:
+                self._s[body][-1] = self._s[body][-1][:-1]
+                self._y[body][-1] = self._y[body][-1][:, :-1]
+
+        self.s_events = [[np.array(s) for s in body_s] for body_s in event_s]
+        self.y_events = [[np.reshape(y, (-1, 8)) for y in body_y] for body_y in event_y]
+        return self.bodies()
+
+    # (E, n) values of the events for the (8, n) states of the active bodies.
+    @staticmethod
+    def __values(s: float, state: np.array, events: list[Callable]) -> np.array:
+        return np.array([np.broadcast_to(event(s, state), state.shape[1:]) for event in events], dtype=float).reshape(len(events), state.shape[1])
+
+    # Retires the bodies which start past a terminal event. Only the events crossed downward are checked, like the
+    # ready-made stopping events, which are positive where the bodies may go : a body is past them where they are <= 0.
+    def __retire(self, s: float, active: np.array, state: np.array, events: list[Callable], terminal: np.array, direction: np.array) -> tuple[np.array, np.array]:
+        if active.size == 0 or not events: return active, state
+
+        values = self.__values(s, state, events)
+        past = (values <= 0) & (terminal & (direction <= 0))[:, None]
+        retired = np.any(past, axis=0)
+
+        self.retired_at[active[retired]] = s
+        self.retired_by[active[retired]] = np.argmax(past[:, retired], axis=0)
+        return active[~retired], state[:, ~retired]
+
+    # (E, n) intervals at which the events crossed zero during the last step, nan where they did not. The roots of every
+    # event are found together, by bisection on the interpolant of the step, down to the resolution of the interval.
+    @staticmethod
+    def __locate(dense: Callable, events: list[Callable], crossed: np.array, s_old: float, s_new: float, n: int) -> np.array:
+        roots = np.full(crossed.shape, np.nan)
+        for k, event in enumerate(events):
+            bodies = np.flatnonzero(crossed[k])
+            if bodies.size == 0: continue
+
+            def evaluate(s: np.array) -> np.array:
+                states = dense(s).reshape(8, n, s.size)[:, bodies, np.arange(s.size)]
+                return np.broadcast_to(event(s, states), s.shape)
+
+            low, high = np.full(bodies.size, min(s_old, s_new)), np.full(bodies.size, max(s_old, s_new))
+            g_low = evaluate(low)
+            while np.any(high - low > 4 * np.finfo(float).eps * np.maximum(1, np.abs(high))):
+                middle = (low + high) / 2
+                g = evaluate(middle)
+                before = (g != 0) & (np.sign(g) == np.sign(g_low)) # The root is after the middle.
+                low, g_low, high = np.where(before, middle, low), np.where(before, g, g_low), np.where(before, high, middle)
+            roots[k, bodies] = high
+        return roots
+
+    # Sparse jacobian of the flattened (8, n) system, made of one 8x8 block per body.
+    @staticmethod
+    def __block_jacobian(jacobian: Callable, n: int, param_values: tuple) -> Callable:
+        component = np.arange(8)[:, None, None] * n
+        body      = np.arange(n)[None, None, :]
+        rows = np.broadcast_to(component + body, (8, 8, n)).ravel()
+        cols = np.broadcast_to(component.transpose(1, 0, 2) + body, (8, 8, n)).ravel()
+
+        def jac(s, y):
+            values = jacobian(y.reshape(8, n), np.empty((8, 8, n)), *param_values)
+            return coo_matrix((values.ravel(), (rows, cols)), shape=(8*n, 8*n)).tocsc()
+        return jac
+
+    # Builds one Body per trajectory, compatible with the plotters and the coordinate conversions.
+    def bodies(self) -> list[Body]:
+        bodies = []
+        for i in range(self.size):
+            body = Body(self._geodesics, self.state[0:4, i], self.state[4:8, i])
+            body.params = self.params
+            if self._s[i]:
+                s = np.concatenate(self._s[i])
+                y = np.concatenate(self._y[i], axis=1)
+                if isinstance(self._geodesics, HamiltonianGeodesics):
+                    body.trajectory = Trajectory.from_arrays(s, y[0:4], self._geodesics.velocity(y[0:4], y[4:8], self.params), y[4:8])
+                else:
+                    body.trajectory = Trajectory.from_arrays(s, y[0:4], y[4:8])
+            bodies.append(body)
+        return bodies
@@ -0,0 +1,130 @@
+from .geodesics import Geodesics
+from .to_lambda import fused_system_to_lambda, lambda_source, source_to_lambda
+
+from typing import Callable
+
+from sympy import *
+import numpy as np
+
+# Ready-made events for Body.solve_trajectory() and Ensemble.solve_trajectory(). They are functions event(s, y) of
+# the interval and of the state vector, with the "terminal" and "direction" attributes read by the solvers. They
+# also accept (8, n) states, so that they work unchanged with an Ensemble. Positions are given by y[0:4], and the
+# radius is y[1] for the coordinate systems of geodpy where it exists (Spherical, OblongEllipsoid). The events are
+# instances of module-level classes rather than closures, so that they can be pickled and sent to the processes of
+# sweep().
+
+### _Event class ###
+# Base of the events, holding the attributes read by the solvers.
+class _Event:
+
+    def __init__(self, terminal: bool, direction: int) -> None:
+        self.terminal  = terminal
+        self.direction = direction
+
+# y[radius_index] - radius, which decreases through zero when the body goes below the radius.
+class _BelowRadius(_Event):
+
+    def __init__(self, radius: float, radius_index: int) -> None:
+        super().__init__(terminal=True, direction=-1)
+        self.radius, self.radius_index = radius, radius_index
+
+    def __call__(self, s, y):
+        return y[self.radius_index] - self.radius
+
+# radius - y[radius_index], which decreases through zero when the body goes past the radius.
+class _AboveRadius(_Event):
+
+    def __init__(self, radius: float, radius_index: int) -> None:
+        super().__init__(terminal=True, direction=-1)
+        self.radius, self.radius_index = radius, radius_index
+
+    def __call__(self, s, y):
+        return self.radius - y[self.radius_index]
+
+# Radial velocity, or radial covariant momentum, y[radius_index + 4].
+class _RadialVelocity(_Event):
+
+    def __init__(self, radius_index: int, terminal: bool, direction: int) -> None:
+        super().__init__(terminal, direction)
+        self.radius_index = radius_index
+
+    def __call__(self, s, y):
+        return y[self.radius_index + 4]
+
+# sign(f)(|f| - tolerance) for a generated function f of the state, see metric_event(). Compiled functions cannot be
+# pickled, so the function is replaced by its generated source, from which it is rebuilt, like for Geodesics.
+class _MetricEvent(_Event):
+
+    def __init__(self, function: Callable, param_values: tuple[float], tolerance: float, terminal: bool) -> None:
+        super().__init__(terminal, direction=0)
+        self.function, self.param_values, self.tolerance = function, param_values, tolerance
+
+    def __call__(self, s, y):
+        value = self.function(y, np.empty((1,) + np.shape(y)[1:]), *self.param_values)[0]
+        return np.sign(value) * (np.abs(value) - self.tolerance)
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, "function": lambda_source(getattr(self.function, "py_func", self.function))}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.function = source_to_lambda(state["function"])
+
+### horizon_event function ###
+# Stops the integration just outside the outer horizon r₊ = (rs + √(rs² - 4a²))/2 of a (rotating) black hole, with
+# the Δ = r² - rs r + a² convention of the examples. In Schwarzschild or Boyer-Lindquist coordinates, the solver
+# otherwise grinds through ever smaller steps as t diverges on the horizon. The margin is relative to r₊.
+def horizon_event(rs: float, a: float = 0, margin: float = 1e-3, radius_index: int = 1) -> Callable:
+    assert 4*a*a <= rs*rs, "There is no horizon for a > rs/2."
+    return _BelowRadius((rs + np.sqrt(rs*rs - 4*a*a)) / 2 * (1 + margin), radius_index)
+
+### escape_event function ###
+# Stops the integration once the body goes past the radius r_max, when it is considered to have escaped.
+def escape_event(r_max: float, radius_index: int = 1) -> Callable:
+    return _AboveRadius(r_max, radius_index)
+
+### light_events function ###
+# Terminal events of light rays : escape past r_escape, then capture just outside of the horizon radius r_horizon.
+# Unlike massive bodies, rays never come back from large radii, so escape_event() ends them without losing anything.
+def light_events(r_horizon: float, r_escape: float, margin: float = 1e-3, radius_index: int = 1) -> list[Callable]:
+    return [escape_event(r_escape, radius_index), _BelowRadius(r_horizon * (1 + margin), radius_index)]
+
+### periapsis_event and apoapsis_event functions ###
+# Record the turning points of the radius, where the radial velocity y[radius_index + 4] changes sign, without
+# stopping the integration. With HamiltonianGeodesics, y[5] is the covariant momentum pᵣ = gᵣᵣ uʳ instead, whose
+# sign is opposite to the one of uʳ when gᵣᵣ < 0: set covariant=True in that case.
+def periapsis_event(radius_index: int = 1, covariant: bool = False, terminal: bool = False) -> Callable:
+    return _RadialVelocity(radius_index, terminal, direction=-1 if covariant else 1)
+
+def apoapsis_event(radius_index: int = 1, covariant: bool = False, terminal: bool = False) -> Callable:
+    return _RadialVelocity(radius_index, terminal, direction=1 if covariant else -1)
+
+### metric_event function ###
+# Event at the zeros of an expression of the coordinates and of the free parameters of the metric, generated and
+# compiled like the right hand side of the system (see Geodesics.rhs()). The numerator of the expression is reduced to
+# the product of its distinct factors which depend on the coordinates, e.g. -r⁴ sin²(θ) becomes r sin(θ), so that the
+# event changes sign whenever any of them crosses zero, even for a zero of even order. The event is
+# sign(f)(|f| - tolerance) for this product f, so that it also triggers when f only tends to zero, like on a horizon
+# that the solver approaches but never crosses, and when a single step jumps over a zero.
+def metric_event(geodesics: Geodesics, expression: Expr, params: dict = None, tolerance: float = 1e-6, terminal: bool = True) -> Callable:
+    coords = geodesics._coordinates.coords
+    numerator, _ = fraction(cancel(expression))
+    _, factors = factor_list(trigsimp(numerator)) # Otherwise, factors hidden behind sin² + cos² = 1 are missed.
+    expression = Mul(*[factor for factor, _ in factors if factor.has(*coords)])
+
+    function = geodesics._compile(fused_system_to_lambda(geodesics._coordinates, [expression], geodesics._params, "numpy"))
+    return _MetricEvent(function, geodesics.param_values(params), tolerance, terminal)
+
+### coordinate_singularity_event function ###
+# Stops the integration where the coordinate system breaks down : where det gₘₖ vanishes, like r = 0 or the poles of
+# spherical and Boyer-Lindquist coordinates, or where a component of the metric diverges, like the horizons of the
+# Schwarzschild and Kerr metrics in these coordinates.
+def coordinate_singularity_event(geodesics: Geodesics, params: dict = None, tolerance: float = 1e-6) -> Callable:
+    denominators = {fraction(cancel(component))[1] for component in geodesics._gₘₖ if component != 0}
+    return metric_event(geodesics, fraction(cancel(geodesics._gₘₖ.det()))[0] * Mul(*denominators), params, tolerance)
+
+### static_limit_event function ###
+# Stops the integration where gₜₜ vanishes. This is the horizon of the Schwarzschild metric, and the boundary of
+# the ergosphere of the Kerr metric, inside of which no observer can remain static.
+def static_limit_event(geodesics: Geodesics, params: dict = None, tolerance: float = 1e-6, time_index: int = 0) -> Callable:
+    return metric_event(geodesics, geodesics._gₘₖ[time_index, time_index], params, tolerance)
@@ -1,45 +1,265 @@
-from .to_lambda import vector_to_lambda
+from .to_lambda import vector_to_lambda, fused_vector_to_lambda, fused_jacobian_to_lambda, fused_system_to_lambda, fused_matrix_to_lambda, lambda_source, source_to_lambda
 from .coordinates import Coordinates
+from .christoffel import Christoffel
+from .cache import GeodesicsCache
+from .simplification import parallel_simplify
+from .metric import inverse_metric
+
+from typing import Callable
+import hashlib
 
 from sympy import *
 import numpy as np
 
 ### Geodesic class ###
-# Class that acts as a variables container for all geodesics.
+# Class that acts as a variables container for all geodesics. The metric may depend on free parameter symbols
+# (e.g. rs or a), in which case the equations are derived once and the parameters are given numerical values
+# only when solving. With backend="numba", the functions used by the solver are JIT-compiled.
+# Every stage (derivation, simplification, lambdification) is lazy and memoized: it runs on the first access to
+# self._dₛuᵏ or self._dₛuᵏ_lambda, or when warm() is called, so only the stages which are used are paid for.
 class Geodesics:
+    backends: tuple[str] = ("python", "numba")
+
+    # Kind of equations of the functions of every dict of generated functions, keyed by module. The names are the ones
+    # of __dict__, normalized by python (NFKC), e.g. "_Jkj_lambda" for self._Jᵏⱼ_lambda.
+    _lambda_kinds: dict[str, str] = {"_rhs_lambda": "rhs", "_Jkj_lambda": "jacobian", "_norm_lambda": "norm", "_metric_lambda": "metric"}
 
-    def __init__(self, coordinates: Coordinates, gₘₖ: Matrix):
+    def __init__(self, coordinates: Coordinates, gₘₖ: Matrix, params: tuple[Symbol] = (), cache: GeodesicsCache = None, backend: str = "python"):
         assert gₘₖ.shape[0] == len(coordinates.coords)
+        assert backend in Geodesics.backends
+        assert gₘₖ.free_symbols <= {coordinates.interval, *params}, "Every free symbol of the metric must be listed in params."
         
-        # Automatic calculation of all geodesics variables
         self._coordinates = coordinates
         self._gₘₖ= gₘₖ
-        self._dₛuᵏ= self.__contravariant_acc()
-        self._dₛuᵏ_lambda = vector_to_lambda(coordinates, self._dₛuᵏ)
+        self._params = tuple(params)
+        self._cache = cache
+        self._backend = backend
+        self._simplified = False
+        self._simplify_options: tuple[float, int] = None # Set by simplify() until the simplification stage ran.
+        self._simplify_report: list[dict] = None
+        self._gᵐᵏ_ = None
+        self._Γᵏₘₙ = None
+        self._Jᵏⱼ = None
+        self._Jᵏⱼ_lambda: dict[str, Callable] = {}
+        self._rhs_lambda: dict[str, Callable] = {}
+        self._norm_lambda: dict[str, Callable] = {}
+        self._metric_lambda: dict[str, Callable] = {}
+        self.__dₛuᵏ = None
+        self.__dₛuᵏ_lambda = None
 
-    # Geodesic covariant equation : ∂ₛuⱼ = 1/2 * ∂ⱼ(gₘₖ) * uᵐ uᵏ where uᵏ = ∂ₛxᵏ 
-    def __covariant_acc(self) -> Array:
-        dₛuⱼ: list[Function] = []
-        uᵐ  : Array = Array(self._coordinates.coords).diff(self._coordinates.interval)
-        uᵐuᵏ: Array = tensorproduct(uᵐ,uᵐ)
+    # Symbolic acceleration vector, derived (and simplified, if requested) on first access.
+    @property
+    def _dₛuᵏ(self) -> Array:
+        self._equations_stage()
+        return self.__dₛuᵏ
 
-        for j, coord in enumerate(self._coordinates.coords):
-            dₛuⱼ.append(1/2 * tensorcontraction(tensorproduct(self._gₘₖ.diff(coord), uᵐuᵏ), (0,1,2,3)))
-        
-        return Array(dₛuⱼ)
+    # Lambda functions of the acceleration vector, generated on first access.
+    @property
+    def _dₛuᵏ_lambda(self) -> list[Callable]:
+        self._lambdas_stage()
+        return self.__dₛuᵏ_lambda
 
-    # Geodesic contravariant equation : ∂ₛuᵏ = gᵐᵏ(∂ₛuₘ - ∂ₛgₘⱼuʲ) where uᵏ = ∂ₛxᵏ
-    def __contravariant_acc(self) -> Array:
-        dₛuₘ_: Array  = self.__covariant_acc()
-        gᵐᵏ_ : Matrix = self._gₘₖ.inv()
-        uʲ   : Array  = Array(self._coordinates.coords).diff(self._coordinates.interval)
-        
-        dₛgₘⱼuʲ= tensorcontraction(tensorproduct( self._gₘₖ.diff(self._coordinates.interval), uʲ             ), (1,2))
-        dₛuᵏ   = tensorcontraction(tensorproduct( gᵐᵏ_                                      , dₛuₘ_ - dₛgₘⱼuʲ), (1,2))
-        
-        return dₛuᵏ
+    # Requests the simplification of the equations. Each component of the acceleration is then simplified in a pool of
+    # processes, with a wall-clock budget in seconds per task, see simplification.parallel_simplify(). Like the other
+    # stages, it only runs on first use. The operation counts saved are stored in self._simplify_report.
+    def simplify(self, budget: float = 30, workers: int = None):
+        if self._simplified: return
+        self._simplified = True
+        self._simplify_options = (budget, workers)
+        self._Jᵏⱼ = None
+        self._Jᵏⱼ_lambda = {}
+        self._rhs_lambda = {}
+        self.__dₛuᵏ_lambda = None
+
+    # Runs the stages ahead of time, e.g. before timing or sending the object to other processes. The fused functions
+    # of rhs() and jacobian() are generated for the given modules.
+    def warm(self, lambdas: bool = True, rhs: tuple[str] = ("math",), jacobian: tuple[str] = ()) -> None:
+        self._equations_stage()
+        if lambdas: self._lambdas_stage()
+        for module in rhs: self.rhs(module)
+        for module in jacobian: self.jacobian(module)
+
+    # Derivation and simplification stages. Equations found in the cache are loaded with their lambda functions.
+    def _equations_stage(self) -> None:
+        if self.__dₛuᵏ is None:
+            entry = self._load("acceleration")
+            if entry is not None:
+                self.__dₛuᵏ, self.__dₛuᵏ_lambda = entry
+                self._simplify_options = None
+                return
+
+            self._Γᵏₘₙ = Christoffel(self._coordinates, self._gₘₖ, self.inverse_metric())
+            self.__dₛuᵏ = self._Γᵏₘₙ.acceleration()
+
+        if self._simplify_options is not None:
+            entry = self._load("acceleration")
+            if entry is not None:
+                self.__dₛuᵏ, self.__dₛuᵏ_lambda = entry
+            else:
+                simplified, self._simplify_report = parallel_simplify(list(self.__dₛuᵏ), *self._simplify_options)
+                self.__dₛuᵏ = Array(simplified)
+            self._simplify_options = None
+
+    # Lambdification stage. The equations are only stored in the cache along with their lambda functions.
+    def _lambdas_stage(self) -> None:
+        self._equations_stage()
+        if self.__dₛuᵏ_lambda is not None: return
+
+        self.__dₛuᵏ_lambda = vector_to_lambda(self._coordinates, self.__dₛuᵏ, self._params)
+        self._store("acceleration", self.__dₛuᵏ, self.__dₛuᵏ_lambda)
+
+    # Jacobian of the acceleration : Jᵏⱼ = ∂(∂ₛuᵏ)/∂yʲ where y = (xᵐ, uᵐ) is the state vector of the solver.
+    # Calculated on first use only, since explicit solvers do not need it. The returned function f(y, out, *params)
+    # writes the jacobian of the whole first order system into the (8, 8) buffer "out". See rhs() for the module.
+    def jacobian(self, module: str = "math") -> Callable:
+        if module in self._Jᵏⱼ_lambda: return self._Jᵏⱼ_lambda[module]
+
+        entry = self._load(f"jacobian_{module}")
+        if entry is not None:
+            self._Jᵏⱼ, (function,) = entry
+        else:
+            if self._Jᵏⱼ is None:
+                state = list(self._coordinates.coords)
+                state.extend([coord.diff(self._coordinates.interval) for coord in self._coordinates.coords])
+                self._Jᵏⱼ = Matrix(self._dₛuᵏ).jacobian(state)
+
+            function = fused_jacobian_to_lambda(self._coordinates, self._Jᵏⱼ, self._params, module)
+            self._store(f"jacobian_{module}", self._Jᵏⱼ, [function])
+
+        self._Jᵏⱼ_lambda[module] = self._compile(function, f"jacobian_{module}")
+        return self._Jᵏⱼ_lambda[module]
+
+    # Single generated function f(y, out, *params) for the whole first order system, with common subexpressions
+    # eliminated across the components of the acceleration. See to_lambda.fused_vector_to_lambda().
+    def rhs(self, module: str = "math") -> Callable:
+        if module in self._rhs_lambda: return self._rhs_lambda[module]
+
+        entry = self._load(f"rhs_{module}")
+        if entry is not None:
+            _, (function,) = entry
+        else:
+            function = fused_vector_to_lambda(self._coordinates, self._dₛuᵏ, self._params, module)
+            self._store(f"rhs_{module}", self._dₛuᵏ, [function])
+
+        self._rhs_lambda[module] = self._compile(function, f"rhs_{module}")
+        return self._rhs_lambda[module]
+
+    # Generated function f(y, out, *params) writing the norm gₘₖ uᵐ uᵏ of the 4-velocity of the state y in out[0]. Along
+    # a geodesic, it stays at its initial value : ±1 for massive bodies, depending on the signature, and 0 for light.
+    # With the numpy module, y may hold (8, N) states, so that a whole trajectory is checked in a single call.
+    def norm(self, module: str = "numpy") -> Callable:
+        if module in self._norm_lambda: return self._norm_lambda[module]
+
+        entry = self._load(f"norm_{module}")
+        if entry is not None:
+            _, (function,) = entry
+        else:
+            uᵏ = Matrix([coord.diff(self._coordinates.interval) for coord in self._coordinates.coords])
+            expression = (uᵏ.T * self._gₘₖ * uᵏ)[0]
+            function = fused_system_to_lambda(self._coordinates, [expression], self._params, module)
+            self._store(f"norm_{module}", expression, [function])
+
+        self._norm_lambda[module] = self._compile(function, f"norm_{module}")
+        return self._norm_lambda[module]
+
+    # Generated function f(y, out, *params) writing the metric gₘₖ at the position of the state y into the (4, 4) buffer
+    # "out". Positions alone are accepted as well, and with the numpy module, y may hold (4, N) positions.
+    def metric(self, module: str = "numpy") -> Callable:
+        if module in self._metric_lambda: return self._metric_lambda[module]
+
+        entry = self._load(f"metric_{module}")
+        if entry is not None:
+            _, (function,) = entry
+        else:
+            function = fused_matrix_to_lambda(self._coordinates, self._gₘₖ, self._params, module)
+            self._store(f"metric_{module}", self._gₘₖ, [function])
+
+        self._metric_lambda[module] = self._compile(function, f"metric_{module}")
+        return self._metric_lambda[module]
+
+    # Projects states back onto the constraint norm() = norm by correcting the time component of their velocity (of
+    # their momentum for HamiltonianGeodesics), which leaves the spatial velocity untouched. The norm is quadratic in
+    # this component, so its coefficients are found from three evaluations and the smallest correction is kept.
+    # States for which there is no real solution are left as is. The states, (8,) or (8, N), are modified in place.
+    def renormalize(self, y: np.array, norm: float, params: dict = None, time_index: int = 0) -> np.array:
+        function, param_values = self.norm("numpy"), self.param_values(params)
+        component = y[4 + time_index].copy()
+        h = np.maximum(1, np.abs(component))
+
+        def evaluate(value: np.array) -> np.array:
+            y[4 + time_index] = value
+            return function(y, np.empty((1,) + y.shape[1:]), *param_values)[0]
+
+        n_minus, n_plus, n_0 = evaluate(component - h), evaluate(component + h), evaluate(component)
+        a = (n_plus + n_minus - 2*n_0) / (2*h*h)
+        b = (n_plus - n_minus) / (2*h)
+        discriminant = b*b - 4*a*(n_0 - norm)
+
+        # Smallest root of a δ² + b δ + (n_0 - norm) = 0, in its numerically stable form.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            δ = 2*(norm - n_0) / (b + np.copysign(np.sqrt(np.maximum(discriminant, 0)), b))
+        y[4 + time_index] = np.where((discriminant >= 0) & np.isfinite(δ), component + δ, component)
+        return y
+
+    # Inverse of the metric, calculated block by block on first use (see metric.inverse_metric()) and kept for the
+    # other derivations which need it.
+    def inverse_metric(self) -> Matrix:
+        if self._gᵐᵏ_ is None: self._gᵐᵏ_ = inverse_metric(self._gₘₖ)
+        return self._gᵐᵏ_
+
+    # Orders the numerical values of the free parameters as expected by the lambda functions. The mapping
+    # can be keyed either by the parameter symbols or by their names.
+    def param_values(self, params: dict = None) -> tuple[float]:
+        if params is None: params = {}
+
+        values = []
+        for param in self._params:
+            if param in params: values.append(params[param])
+            elif str(param) in params: values.append(params[str(param)])
+            else: raise ValueError(f"Missing value for the metric parameter '{param}'.")
+        return tuple(values)
+
+    # Lambda functions cannot be pickled, so they are replaced by their generated source, from which they are rebuilt
+    # when unpickling. This lets Geodesics objects be sent to other processes without deriving the equations again.
+    # Every attribute named "*_lambda" is either a list of lambdify functions or a dict of generated functions.
+    def __getstate__(self) -> dict:
+        def source(function: Callable) -> str:
+            return lambda_source(getattr(function, "py_func", function)) # py_func is the python version of numba functions.
+
+        state = self.__dict__.copy()
+        for name, value in state.items():
+            if not name.endswith("_lambda") or value is None: continue
+            if isinstance(value, dict): state[name] = {module: source(function) for module, function in value.items()}
+            else: state[name] = [source(function) for function in value]
+        return state
+
+    # Python normalizes identifiers (NFKC), so the keys of the state are e.g. "_dsuk_lambda" for self._dₛuᵏ_lambda.
+    # They are thus left as is and simply put back in __dict__.
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        for name, value in state.items():
+            if not name.endswith("_lambda") or value is None: continue
+            if isinstance(value, dict): self.__dict__[name] = {module: self._compile(source_to_lambda(source), f"{self._lambda_kinds[name]}_{module}") for module, source in value.items()}
+            else: self.__dict__[name] = [source_to_lambda(source) for source in value]
+
+    # Compiles a generated function with the backend of the object. The compiled code is kept in the cache (the default
+    # one if the object has none) with the entry of its kind of equations, so that both are evicted together. Functions
+    # of no kind, e.g. the ones of the events, are keyed by their source.
+    def _compile(self, function: Callable, kind: str = None) -> Callable:
+        if self._backend == "numba":
+            cache = self._cache if self._cache is not None else GeodesicsCache()
+            if kind is None: kind = f"jit_{hashlib.sha256(lambda_source(function).encode()).hexdigest()}"
+            return cache.jit(self._key(kind), function)
+        return function
+
+    def _key(self, kind: str) -> str:
+        return GeodesicsCache.key(self._coordinates, self._gₘₖ, self._simplified, self._params, kind)
 
-    def simplify(self):
-        self._dₛuᵏ= simplify(self._dₛuᵏ)
-        self._dₛuᵏ_lambda = vector_to_lambda(self._coordinates, self._dₛuᵏ)
+    # Fetches equations from the cache, if there is one. Returns None on a cache miss.
+    def _load(self, kind: str) -> tuple | None:
+        if self._cache is None: return None
+        return self._cache.load(self._key(kind))
 
+    def _store(self, kind: str, expressions, lambda_functions: list[Callable]) -> None:
+        if self._cache is None: return
+        self._cache.store(self._key(kind), expressions, lambda_functions)
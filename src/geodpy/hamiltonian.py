@@ -0,0 +1,174 @@
+from .to_lambda import vector_to_lambda, fused_system_to_lambda, fused_matrix_to_lambda
+from .coordinates import Coordinates
+from .geodesics import Geodesics
+from .cache import GeodesicsCache
+from .simplification import parallel_simplify
+
+from typing import Callable
+
+from sympy import *
+import numpy as np
+
+### HamiltonianGeodesics class ###
+# Geodesics in their Hamiltonian form H = 1/2 gᵐᵏ pₘ pₖ, where pₖ = gₖₘ uᵐ is the covariant momentum. The first order
+# system of the state (xᵏ, pₖ) is ∂ₛxᵏ = ∂H/∂pₖ = gᵏᵐ pₘ and ∂ₛpₖ = -∂H/∂xᵏ = -1/2 ∂ₖgᵐⁿ pₘ pₙ. Only derivatives of the
+# inverse metric are needed, no Christoffel symbols, and the momentum of any cyclic coordinate is exactly constant.
+# Objects are used like Geodesics: Body converts the initial velocity to a momentum before solving, and back after.
+# Only the stages of the equations differ from Geodesics, whose members specific to the acceleration ∂ₛuᵏ raise.
+class HamiltonianGeodesics(Geodesics):
+    _lambda_kinds: dict[str, str] = {"_rhs_lambda": "hamiltonian_rhs", "_Jkj_lambda": "hamiltonian_jacobian", "_norm_lambda": "hamiltonian_norm", "_metric_lambda": "metric", "_conversion_lambda": "conversion"}
+
+    def __init__(self, coordinates: Coordinates, gₘₖ: Matrix, params: tuple[Symbol] = (), cache: GeodesicsCache = None, backend: str = "python", gᵐᵏ_: Matrix = None):
+        super().__init__(coordinates, gₘₖ, params, cache, backend)
+        self._gᵐᵏ_ = gᵐᵏ_
+        self._pₖ = tuple(Symbol(f"p_{coord.func.__name__}") for coord in coordinates.coords)
+        self._conversion_lambda: dict[str, Callable] = {}
+        self.__dₛxᵏ = None
+        self.__dₛpₖ = None
+        self.__dₛxᵏ_lambda = None
+        self.__dₛpₖ_lambda = None
+
+    # There is no acceleration in the Hamiltonian form, so the members of Geodesics which give it are not available.
+    @property
+    def _dₛuᵏ(self) -> Array:
+        raise AttributeError("HamiltonianGeodesics have no acceleration ∂ₛuᵏ, but the equations _dₛxᵏ and _dₛpₖ of the state (xᵏ, pₖ).")
+
+    @property
+    def _dₛuᵏ_lambda(self) -> list[Callable]:
+        raise AttributeError("HamiltonianGeodesics have no acceleration ∂ₛuᵏ, but the lambda functions _dₛxᵏ_lambda and _dₛpₖ_lambda, or the fused rhs().")
+
+    # Like Geodesics._dₛuᵏ, every stage is lazy : the equations and their lambda functions are made on first access.
+    @property
+    def _dₛxᵏ(self) -> Array:
+        self._equations_stage()
+        return self.__dₛxᵏ
+
+    @property
+    def _dₛpₖ(self) -> Array:
+        self._equations_stage()
+        return self.__dₛpₖ
+
+    @property
+    def _dₛxᵏ_lambda(self) -> list[Callable]:
+        self._lambdas_stage()
+        return self.__dₛxᵏ_lambda
+
+    @property
+    def _dₛpₖ_lambda(self) -> list[Callable]:
+        self._lambdas_stage()
+        return self.__dₛpₖ_lambda
+
+    # Simplifies ∂H/∂pₖ then -∂H/∂xᵏ, reported in this order in self._simplify_report. See Geodesics.simplify().
+    def simplify(self, budget: float = 30, workers: int = None):
+        if self._simplified: return
+        super().simplify(budget, workers)
+        self.__dₛxᵏ_lambda = None
+        self.__dₛpₖ_lambda = None
+
+    def _equations_stage(self) -> None:
+        if self.__dₛxᵏ is None:
+            if self.__load(): return
+
+            self.__dₛxᵏ = Array(list(self.inverse_metric() * Matrix(self._pₖ)))
+
+            dₛpₖ: list[Expr] = []
+            for coord in self._coordinates.coords:
+                dₖgᵐⁿ = self.inverse_metric().diff(coord)
+                dₛpₖ.append(-sum((dₖgᵐⁿ[m, n] * self._pₖ[m] * self._pₖ[n] for m in range(4) for n in range(4) if dₖgᵐⁿ[m, n] != 0), S.Zero) / 2)
+            self.__dₛpₖ = Array(dₛpₖ)
+
+        if self._simplify_options is not None:
+            if not self.__load():
+                simplified, self._simplify_report = parallel_simplify([*self.__dₛxᵏ, *self.__dₛpₖ], *self._simplify_options)
+                self.__dₛxᵏ = Array(simplified[0:4])
+                self.__dₛpₖ = Array(simplified[4:8])
+            self._simplify_options = None
+
+    def _lambdas_stage(self) -> None:
+        self._equations_stage()
+        if self.__dₛxᵏ_lambda is not None: return
+
+        lambda_functions = vector_to_lambda(self._coordinates, self.__as_state(self.__dₛxᵏ), self._params)
+        lambda_functions.extend(vector_to_lambda(self._coordinates, self.__as_state(self.__dₛpₖ), self._params))
+        self._store("hamiltonian", (self.inverse_metric(), self.__dₛxᵏ, self.__dₛpₖ), lambda_functions)
+        self.__dₛxᵏ_lambda, self.__dₛpₖ_lambda = lambda_functions[0:4], lambda_functions[4:8]
+
+    # Jacobian of the whole first order system with respect to the state (xᵏ, pₖ). See Geodesics.jacobian().
+    def jacobian(self, module: str = "math") -> Callable:
+        if module in self._Jᵏⱼ_lambda: return self._Jᵏⱼ_lambda[module]
+
+        entry = self._load(f"hamiltonian_jacobian_{module}")
+        if entry is not None:
+            self._Jᵏⱼ, (function,) = entry
+        else:
+            if self._Jᵏⱼ is None:
+                self._Jᵏⱼ = Matrix([*self._dₛxᵏ, *self._dₛpₖ]).jacobian([*self._coordinates.coords, *self._pₖ])
+
+            function = fused_matrix_to_lambda(self._coordinates, self.__as_state(self._Jᵏⱼ), self._params, module)
+            self._store(f"hamiltonian_jacobian_{module}", self._Jᵏⱼ, [function])
+
+        self._Jᵏⱼ_lambda[module] = self._compile(function, f"hamiltonian_jacobian_{module}")
+        return self._Jᵏⱼ_lambda[module]
+
+    # Single generated function f(y, out, *params) for the whole first order system of the state y = (xᵏ, pₖ).
+    def rhs(self, module: str = "math") -> Callable:
+        if module in self._rhs_lambda: return self._rhs_lambda[module]
+
+        entry = self._load(f"hamiltonian_rhs_{module}")
+        if entry is not None:
+            _, (function,) = entry
+        else:
+            expressions = [self.__as_state(expr) for expr in [*self._dₛxᵏ, *self._dₛpₖ]]
+            function = fused_system_to_lambda(self._coordinates, expressions, self._params, module)
+            self._store(f"hamiltonian_rhs_{module}", (self._dₛxᵏ, self._dₛpₖ), [function])
+
+        self._rhs_lambda[module] = self._compile(function, f"hamiltonian_rhs_{module}")
+        return self._rhs_lambda[module]
+
+    # Norm gᵐᵏ pₘ pₖ = gₘₖ uᵐ uᵏ of the state y = (xᵏ, pₖ), i.e. twice the hamiltonian. See Geodesics.norm().
+    def norm(self, module: str = "numpy") -> Callable:
+        if module in self._norm_lambda: return self._norm_lambda[module]
+
+        entry = self._load(f"hamiltonian_norm_{module}")
+        if entry is not None:
+            _, (function,) = entry
+        else:
+            expression = sum(p * dₛxᵏ for p, dₛxᵏ in zip(self._pₖ, self._dₛxᵏ))
+            function = fused_system_to_lambda(self._coordinates, [self.__as_state(expression)], self._params, module)
+            self._store(f"hamiltonian_norm_{module}", expression, [function])
+
+        self._norm_lambda[module] = self._compile(function, f"hamiltonian_norm_{module}")
+        return self._norm_lambda[module]
+
+    # Covariant momentum pₘ = gₘₖ uᵏ of the given 4-velocities. Positions and velocities are either vectors or (4, N)
+    # arrays, in which case the momenta of every column are returned.
+    def momentum(self, position: np.array, velocity: np.array, params: dict = None) -> np.array:
+        return self.__convert("momentum", self._gₘₖ, position, velocity, params)
+
+    # 4-velocity uᵏ = gᵏᵐ pₘ of the given covariant momenta. See momentum().
+    def velocity(self, position: np.array, momentum: np.array, params: dict = None) -> np.array:
+        return self.__convert("velocity", self.inverse_metric(), position, momentum, params)
+
+    # Both conversions are a product with a metric, generated on first use and evaluated for many states at once.
+    def __convert(self, kind: str, matrix: Matrix, position: np.array, vector: np.array, params: dict) -> np.array:
+        if kind not in self._conversion_lambda:
+            uᵏ = Matrix([coord.diff(self._coordinates.interval) for coord in self._coordinates.coords])
+            self._conversion_lambda[kind] = self._compile(fused_system_to_lambda(self._coordinates, list(matrix * uᵏ), self._params, "numpy"), f"conversion_{kind}")
+
+        position = np.asarray(position, dtype=float)
+        vector   = np.asarray(vector, dtype=float)
+        return self._conversion_lambda[kind](np.concatenate([position, vector]), np.empty(vector.shape), *self.param_values(params))
+
+    # Momenta are given to the lambda functions in place of the derivatives of the coordinates.
+    def __as_state(self, expression: Expr) -> Expr:
+        return expression.xreplace({pₖ: coord.diff(self._coordinates.interval) for pₖ, coord in zip(self._pₖ, self._coordinates.coords)})
+
+    # Loads the equations and their lambda functions from the cache. Returns False on a cache miss.
+    def __load(self) -> bool:
+        entry = self._load("hamiltonian")
+        if entry is None: return False
+
+        (self._gᵐᵏ_, self.__dₛxᵏ, self.__dₛpₖ), lambda_functions = entry
+        self.__dₛxᵏ_lambda, self.__dₛpₖ_lambda = lambda_functions[0:4], lambda_functions[4:8]
+        self._simplify_options = None
+        return True
@@ -0,0 +1,231 @@
+from typing import Callable
+import warnings
+
+from scipy.linalg import lu_factor, lu_solve
+import numpy as np
+
+# Fixed-step integrators of the first order geodesic system, used by Body.solve_trajectory() for the methods listed
+# in fixed_step_methods. They take the fused functions of Geodesics.rhs() and Geodesics.jacobian(), and write each
+# step straight into the preallocated (8, N) trajectory array "y", where y[:,0] holds the initial state. Like
+# solve_ivp, they return the amount of points written, a status and a message : the status is 0 when the interval was
+# completed, 1 when a terminal event was triggered and -1 when a step failed, in which case fewer than N points are
+# written.
+
+# Classic explicit Runge-Kutta method of order 4.
+def rk4(rhs: Callable, jacobian: Callable, s: np.array, y: np.array, params: tuple, events: list[Callable] = (), atol: float = 1e-8, rtol: float = 1e-8) -> tuple[int, int, str]:
+    k1, k2, k3, k4 = (np.empty(y.shape[0]) for _ in range(4))
+
+    def step(h: float, y0: np.array, y1: np.array) -> bool:
+        rhs(y0           , k1, *params)
+        rhs(y0 + h/2 * k1, k2, *params)
+        rhs(y0 + h/2 * k2, k3, *params)
+        rhs(y0 + h   * k3, k4, *params)
+        y1[:] = y0 + h/6 * (k1 + 2*k2 + 2*k3 + k4)
+        return True
+
+    return _integrate(step, s, y, events)
+
+# Implicit midpoint rule, symplectic and of order 2. The implicit equation y1 = y0 + h f((y0 + y1)/2) is solved with
+# Newton's method.
+def implicit_midpoint(rhs: Callable, jacobian: Callable, s: np.array, y: np.array, params: tuple, events: list[Callable] = (), atol: float = 1e-8, rtol: float = 1e-8) -> tuple[int, int, str]:
+    n = y.shape[0]
+    f, J, I = np.empty(n), np.empty((n, n)), np.eye(n)
+
+    def step(h: float, y0: np.array, y1: np.array) -> bool:
+        y1[:] = y0 + h * rhs(y0, f, *params) # Explicit Euler predictor
+        for _ in range(_max_newton_iterations):
+            midpoint = (y0 + y1)/2
+            residual = y1 - y0 - h * rhs(midpoint, f, *params)
+            Δ = np.linalg.solve(I - h/2 * jacobian(midpoint, J, *params), -residual)
+            y1 += Δ
+            if _converged(Δ, y1, atol, rtol): return True
+        return False
+
+    return _integrate(step, s, y, events)
+
+# Gauss-Legendre method with 2 stages, symplectic and of order 4. The stages are solved with a simplified Newton
+# method, using the jacobian at the start of the step.
+def gauss_legendre(rhs: Callable, jacobian: Callable, s: np.array, y: np.array, params: tuple, events: list[Callable] = (), atol: float = 1e-8, rtol: float = 1e-8) -> tuple[int, int, str]:
+    n = y.shape[0]
+    A = np.array([[1/4, 1/4 - np.sqrt(3)/6], [1/4 + np.sqrt(3)/6, 1/4]])
+    b = np.array([1/2, 1/2])
+    F, J, I = np.empty((2, n)), np.empty((n, n)), np.eye(2*n)
+
+    def step(h: float, y0: np.array, y1: np.array) -> bool:
+        LU = lu_factor(I - h * np.kron(A, jacobian(y0, J, *params)))
+        Z = np.zeros((2, n)) # Increments of the stages from y0
+        converged = False
+        for _ in range(_max_newton_iterations):
+            rhs(y0 + Z[0], F[0], *params)
+            rhs(y0 + Z[1], F[1], *params)
+            Δ = lu_solve(LU, (h * A @ F - Z).ravel()).reshape(2, n)
+            Z += Δ
+            if _converged(Δ, y0 + Z, atol, rtol):
+                converged = True
+                break
+
+        rhs(y0 + Z[0], F[0], *params)
+        rhs(y0 + Z[1], F[1], *params)
+        y1[:] = y0 + h * b @ F
+        return converged
+
+    return _integrate(step, s, y, events)
+
+fixed_step_methods: dict[str, Callable] = {
+    "RK4"             : rk4,
+    "ImplicitMidpoint": implicit_midpoint,
+    "GaussLegendre4"  : gauss_legendre,
+}
+
+_max_newton_iterations: int = 20
+
+def _converged(Δ: np.array, y: np.array, atol: float, rtol: float) -> bool:
+    return np.max(np.abs(Δ) / (atol + rtol * np.abs(y))) < 1
+
+# Common loop of the integrators. Stops after the step where a terminal event changes sign in its direction. A step
+# which raises, like the math module does outside of its domain, or which is not finite, like near a horizon, is
+# dropped and ends the integration with the failure status, since the events could never be triggered on NaN.
+def _integrate(step: Callable, s: np.array, y: np.array, events: list[Callable]) -> tuple[int, int, str]:
+    previous = [event(s[0], y[:,0]) for event in events]
+    unconverged_steps = 0
+    points, status, message = len(s), 0, "The solver successfully reached the end of the integration interval."
+
+    for i in range(len(s) - 1):
+        try:
+            with np.errstate(divide="ignore", over="ignore", invalid="ignore"): # Reported as a failure instead.
+                if not step(s[i+1] - s[i], y[:,i], y[:,i+1]): unconverged_steps += 1
+            failure = None if np.all(np.isfinite(y[:,i+1])) else "the state is not finite"
+        except (ArithmeticError, ValueError, np.linalg.LinAlgError) as error:
+            failure = str(error)
+
+        if failure is not None:
+            points, status, message = i + 1, -1, f"Step failed at s = {s[i]} ({failure}). Consider a smaller step."
+            break
+
+        terminated = False
+        for k, event in enumerate(events):
+            value = event(s[i+1], y[:,i+1])
+            direction = getattr(event, "direction", 0)
+            crossed = (previous[k] < 0 <= value and direction >= 0) or (previous[k] > 0 >= value and direction <= 0)
+            previous[k] = value
+            terminated = terminated or (crossed and getattr(event, "terminal", False))
+
+        if terminated:
+            points, status, message = i + 2, 1, "A termination event occurred."
+            break
+
+    if unconverged_steps > 0:
+        warnings.warn(f"Newton's method did not converge on {unconverged_steps} steps. Consider a smaller step.", RuntimeWarning)
+    return points, status, message
+
+# Dormand-Prince 5(4) coefficients.
+_dp_c = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+_dp_a = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+_dp_e = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40]) # 5th minus 4th order weights
+
+# Dense output of order 4 of a step : y(s + θh) = y + h Σᵢ Kᵢ Σⱼ Pᵢⱼ θʲ⁺¹, with the coefficients of scipy's RK45.
+_dp_p = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+# States at the fractions θ of the steps of the (8, m) states y, of steps h and stages K of shape (7, 8, m).
+def _dp_dense(y: np.array, h: np.array, K: np.array, θ: np.array) -> np.array:
+    weights = _dp_p @ (θ[None, :] ** np.arange(1, 5)[:, None])
+    return y + h * np.einsum("im,ijm->jm", weights, K)
+
+# Fractions θ of the steps at which an event crosses zero, by bisection on the dense output, down to 2⁻⁵² of the step.
+# "before" holds the values of the event at the start of the steps, which are not zero.
+def _dp_crossing(event: Callable, y: np.array, h: np.array, K: np.array, before: np.array) -> np.array:
+    low, high = np.zeros(y.shape[1]), np.ones(y.shape[1])
+    for _ in range(52):
+        middle = (low + high) / 2
+        value = np.asarray(event(0, _dp_dense(y, h, K, middle)), dtype=float)
+        before_root = (value != 0) & (np.sign(value) == np.sign(before))
+        low, high = np.where(before_root, middle, low), np.where(before_root, high, middle)
+    return high
+
+### batch_dormand_prince function ###
+# Explicit Runge-Kutta 5(4) method advancing many independent states at once, each with its own step size, used to
+# trace rays. The fused function rhs("numpy") is evaluated on the (8, n) states of the rays which are still active,
+# and a ray is retired as soon as one of the terminal events changes sign for it in its direction, or when it reaches
+# s_max. The crossing is then located on the dense output of the step, and the ray ends on it rather than at the end
+# of the step, which may be far past it where the steps are long. Only the final states are kept. Returns the final (8, n) states, the final intervals, and the index of the
+# event which stopped each ray, -1 if none did within max_steps.
+def batch_dormand_prince(rhs: Callable, y: np.array, params: tuple, events: list[Callable] = (), s_max: float = np.inf, atol: float = 1e-8, rtol: float = 1e-8, h0: float = 1e-2, max_steps: int = 10000) -> tuple[np.array, np.array, np.array]:
+    y = np.array(y, dtype=float)
+    n = y.shape[1]
+    s = np.zeros(n)
+    h = np.full(n, h0, dtype=float)
+    stopped = np.full(n, -1)
+
+    active = np.arange(n)
+    previous = [np.array(event(0, y), dtype=float) for event in events] # Copies, as events may return rows of y.
+    k1 = rhs(y, np.empty(y.shape), *params)
+
+    for _ in range(max_steps):
+        if active.size == 0: break
+        ya, sa = y[:, active], s[active]
+        ha = np.minimum(h[active], s_max - sa)
+
+        K = np.empty((7,) + ya.shape)
+        K[0] = k1[:, active]
+        for i in range(1, 7):
+            stage = ya + ha * sum(coefficient * K[j] for j, coefficient in enumerate(_dp_a[i]) if coefficient != 0)
+            rhs(stage, K[i], *params)
+        y_new = stage # The last stage is evaluated at the 5th order solution (FSAL).
+
+        scale = atol + rtol * np.maximum(np.abs(ya), np.abs(y_new))
+        error = np.sqrt(np.mean((ha * np.tensordot(_dp_e, K, axes=1) / scale)**2, axis=0))
+        error = np.where(np.isfinite(error), error, np.inf)
+        accepted = error <= 1
+
+        factor = np.where(error == 0, 5, 0.9 * np.maximum(error, 1e-10)**-0.2)
+        h[active] = ha * np.clip(factor, 0.2, 5)
+
+        # Accepted steps are kept, and the events are checked on them only.
+        columns = active[accepted]
+        y[:, columns], s[columns] = y_new[:, accepted], sa[accepted] + ha[accepted]
+        k1[:, columns] = K[6][:, accepted]
+        y_step, h_step, K_step = ya[:, accepted], ha[accepted], K[:, :, accepted]
+
+        # The ray stops on the first terminal crossing of the step, as a fraction of the step.
+        retired = s[columns] >= s_max
+        first = np.full(columns.size, np.inf)
+        for k, event in enumerate(events):
+            value = np.asarray(event(0, y[:, columns]))
+            before = previous[k][columns]
+            direction = getattr(event, "direction", 0)
+            crossed = np.zeros(columns.size, dtype=bool)
+            if direction >= 0: crossed |= (before < 0) & (value >= 0)
+            if direction <= 0: crossed |= (before > 0) & (value <= 0)
+            if getattr(event, "terminal", False) and np.any(crossed):
+                hit = np.flatnonzero(crossed)
+                θ = _dp_crossing(event, y_step[:, hit], h_step[hit], K_step[:, :, hit], before[hit])
+                earlier = θ < first[hit]
+                first[hit[earlier]] = θ[earlier]
+                stopped[columns[hit[earlier]]] = k
+                retired |= crossed
+            previous[k][columns] = value
+
+        hit = np.flatnonzero(np.isfinite(first))
+        if hit.size > 0:
+            y[:, columns[hit]] = _dp_dense(y_step[:, hit], h_step[hit], K_step[:, :, hit], first[hit])
+            s[columns[hit]] = sa[accepted][hit] + first[hit] * h_step[hit]
+
+        active = np.setdiff1d(active, columns[retired], assume_unique=True)
+
+    return y, s, stopped
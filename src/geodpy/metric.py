@@ -0,0 +1,45 @@
+from sympy import *
+
+# Groups the indices of a symmetric matrix into the blocks coupled by nonzero off-diagonal entries. For the Kerr metric
+# in Boyer-Lindquist coordinates, this gives [[0, 3], [1], [2]] : a t-φ block, and diagonal r and θ entries.
+def metric_blocks(gₘₖ: Matrix) -> list[list[int]]:
+    dim = gₘₖ.shape[0]
+    block_of = list(range(dim))
+
+    def find(i: int) -> int:
+        while block_of[i] != i: i = block_of[i]
+        return i
+
+    for m in range(dim):
+        for k in range(m + 1, dim):
+            if gₘₖ[m, k] != 0 or gₘₖ[k, m] != 0:
+                block_of[find(k)] = find(m)
+
+    blocks: dict[int, list[int]] = {}
+    for i in range(dim):
+        blocks.setdefault(find(i), []).append(i)
+    return list(blocks.values())
+
+### inverse_metric function ###
+# Inverts a metric block by block, see metric_blocks(). Diagonal entries are inverted with a reciprocal and 2x2 blocks
+# with their closed form, whose determinant is put over a common denominator. Only bigger blocks go through the
+# generic Matrix.inv(). This avoids the bloated expressions of inverting the whole 4x4 metric at once.
+def inverse_metric(gₘₖ: Matrix) -> Matrix:
+    gᵐᵏ_ = zeros(*gₘₖ.shape)
+    for block in metric_blocks(gₘₖ):
+        if len(block) == 1:
+            i, = block
+            gᵐᵏ_[i, i] = 1 / gₘₖ[i, i]
+        elif len(block) == 2:
+            i, j = block
+            det = factor(cancel(gₘₖ[i, i] * gₘₖ[j, j] - gₘₖ[i, j] * gₘₖ[j, i]))
+            gᵐᵏ_[i, i] =  gₘₖ[j, j] / det
+            gᵐᵏ_[j, j] =  gₘₖ[i, i] / det
+            gᵐᵏ_[i, j] = -gₘₖ[i, j] / det
+            gᵐᵏ_[j, i] = -gₘₖ[j, i] / det
+        else:
+            inverse = gₘₖ.extract(block, block).inv()
+            for a, i in enumerate(block):
+                for b, j in enumerate(block):
+                    gᵐᵏ_[i, j] = inverse[a, b]
+    return gᵐᵏ_
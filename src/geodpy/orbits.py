@@ -0,0 +1,113 @@
+from .trajectory import Trajectory
+from .storage import TrajectoryStore
+
+import numpy as np
+
+### OrbitAnalysis class ###
+# Finds the periapsis and apoapsis passages of bound orbits, from which the precession per orbit and the fundamental
+# frequencies are calculated. Points are given chunk by chunk as rows [s, x⁰..x³, u⁰..u³, ...] of the layout of
+# Trajectory, e.g. slices of a memory-mapped streamed trajectory, so that arbitrarily long integrations are analysed
+# in constant memory. The last point of every chunk is kept to find the passages between two chunks.
+# A passage is located between two points where the radial velocity uʳ changes sign, as the extremum of the cubic
+# Hermite interpolant of r(s) built from the radii and the radial velocities of both points, which is the dense output
+# of the solvers of order 3. The state at the passage is interpolated the same way, so no point has to be solved again.
+# Passages located by the solver with periapsis_event() and apoapsis_event() can be given instead, see add_events().
+class OrbitAnalysis:
+    kinds: tuple[str] = ("periapsis", "apoapsis")
+
+    def __init__(self, radius_index: int = 1, time_index: int = 0, phi_index: int = 3) -> None:
+        self.radius_index, self.time_index, self.phi_index = radius_index, time_index, phi_index
+        self._passages: dict[str, list[np.array]] = {kind: [] for kind in OrbitAnalysis.kinds}
+        self._last: np.array = None
+
+    # Analyses the next chunk of points, of shape (n, columns) with columns >= 9.
+    def update(self, rows: np.array) -> None:
+        rows = np.asarray(rows[:, 0:9], dtype=float)
+        if rows.shape[0] == 0: return
+        if self._last is not None: rows = np.concatenate([self._last[None, :], rows])
+        self._last = rows[-1].copy()
+
+        uʳ = rows[:, 5 + self.radius_index]
+        periapsides = np.flatnonzero((uʳ[:-1] < 0) & (uʳ[1:] >= 0))
+        apoapsides  = np.flatnonzero((uʳ[:-1] > 0) & (uʳ[1:] <= 0))
+        self._passages["periapsis"].append(self.__locate(rows, periapsides))
+        self._passages["apoapsis"].append(self.__locate(rows, apoapsides))
+
+    # Adds the passages located by the solver, e.g. from body.solver_result.t_events[k] and y_events[k] for the event
+    # periapsis_event() or apoapsis_event() of index k. Only valid for Geodesics, whose state holds the 4-velocity.
+    def add_events(self, kind: str, s_events: np.array, y_events: np.array) -> None:
+        assert kind in OrbitAnalysis.kinds
+        y_events = np.reshape(y_events, (-1, 8))
+        self._passages[kind].append(np.column_stack([s_events, y_events]))
+
+    @classmethod
+    def from_trajectory(cls, trajectory: Trajectory, rows: int = 100000, **kwargs) -> "OrbitAnalysis":
+        analysis = cls(**kwargs)
+        for start in range(0, len(trajectory), rows):
+            analysis.update(trajectory.data[start:start + rows])
+        return analysis
+
+    # Analyses a trajectory streamed to a .npy file (see Body.solve_trajectory()), reading "rows" points at a time.
+    @classmethod
+    def from_file(cls, path: str, rows: int = 100000, **kwargs) -> "OrbitAnalysis":
+        return cls.from_trajectory(Trajectory(TrajectoryStore.load(path)), rows, **kwargs)
+
+    # (k, 9) rows [s, x⁰..x³, u⁰..u³] of the passages at periapsis, sorted in interval.
+    @property
+    def periapsides(self) -> np.array:
+        return self.__passages("periapsis")
+
+    @property
+    def apoapsides(self) -> np.array:
+        return self.__passages("apoapsis")
+
+    # Advance of the periapsis at every orbit, Δφ - 2π between consecutive periapsis passages.
+    def precession(self, kind: str = "periapsis") -> np.array:
+        return np.diff(self.__passages(kind)[:, 1 + self.phi_index]) - 2*np.pi
+
+    # Radial period T_r, and the radial and azimuthal frequencies Ω_r = 2π/T_r and Ω_φ = <Δφ>/T_r, averaged over the
+    # complete radial periods between the first and the last periapsis passage. The periapsis precesses at the rate
+    # Ω_φ - Ω_r. The periods are in coordinate time, or in interval (proper time) with proper_time=True.
+    def frequencies(self, kind: str = "periapsis", proper_time: bool = False) -> dict[str, float]:
+        passages = self.__passages(kind)
+        assert passages.shape[0] >= 2, "At least two passages are needed for a complete radial period."
+
+        time = passages[:, 0] if proper_time else passages[:, 1 + self.time_index]
+        φ = passages[:, 1 + self.phi_index]
+        orbits = passages.shape[0] - 1
+
+        T_r = (time[-1] - time[0]) / orbits
+        Ω_r = 2*np.pi / T_r
+        Ω_φ = (φ[-1] - φ[0]) / (time[-1] - time[0])
+        return {"orbits": orbits, "T_r": T_r, "Ω_r": Ω_r, "Ω_φ": Ω_φ, "precession_rate": Ω_φ - Ω_r, "precession": (φ[-1] - φ[0]) / orbits - 2*np.pi}
+
+    def __passages(self, kind: str) -> np.array:
+        assert kind in OrbitAnalysis.kinds
+        passages = np.concatenate([np.empty((0, 9))] + self._passages[kind])
+        passages = passages[np.argsort(passages[:, 0], kind="stable")]
+        self._passages[kind] = [passages]
+        return passages
+
+    # States at the extremum of r between the points i and i + 1, for every given i.
+    def __locate(self, rows: np.array, i: np.array) -> np.array:
+        start, end = rows[i], rows[i + 1]
+        h = end[:, 0] - start[:, 0]
+        r0, r1 = start[:, 1 + self.radius_index], end[:, 1 + self.radius_index]
+        v0, v1 = start[:, 5 + self.radius_index], end[:, 5 + self.radius_index]
+
+        # Root in [0, 1] of the derivative a τ² + b τ + c of the Hermite interpolant, which changes sign on [0, 1].
+        a = 6*(r0 - r1) + 3*h*(v0 + v1)
+        b = -6*(r0 - r1) - h*(4*v0 + 2*v1)
+        c = h*v0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            q = -(b + np.copysign(np.sqrt(np.maximum(b*b - 4*a*c, 0)), b)) / 2
+            roots = np.stack([c / q, q / a])
+        inside = (roots >= 0) & (roots <= 1)
+        τ = np.where(inside[0], roots[0], np.where(inside[1], roots[1], v0 / (v0 - v1)))[:, None]
+
+        # Hermite interpolation of the positions, with the velocities as derivatives, and linear one of the velocities.
+        h00, h10, h01, h11 = 2*τ**3 - 3*τ**2 + 1, τ**3 - 2*τ**2 + τ, -2*τ**3 + 3*τ**2, τ**3 - τ**2
+        positions = h00 * start[:, 1:5] + h10 * h[:, None] * start[:, 5:9] + h01 * end[:, 1:5] + h11 * h[:, None] * end[:, 5:9]
+        velocities = (1 - τ) * start[:, 5:9] + τ * end[:, 5:9]
+        velocities[:, self.radius_index] = 0
+        return np.column_stack([start[:, 0] + τ[:, 0] * h, positions, velocities])
@@ -0,0 +1,131 @@
+from .geodesics import Geodesics
+from .integrators import batch_dormand_prince
+from .events import light_events
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+### Camera class ###
+# Pinhole camera of an observer at rest at "position", in coordinates (t, r, θ, φ) like the ones of Spherical and
+# OblongEllipsoid. The observer is the zero angular momentum observer, whose 4-velocity is the dual of dt, which is the
+# static observer when the metric has no t-φ term. Its orthonormal frame (e₀, e_r, e_θ, e_φ) is built from the metric
+# with the Gram-Schmidt process, and the camera looks towards the origin, along -e_r, with e_φ to the right and -e_θ
+# up. For every pixel, the photon received from the direction n of the pixel has the momentum e₀ - n, and is traced
+# back in time from the camera with the opposite 4-velocity -e₀ + n, which is null. Its energy is 1 for the observer.
+class Camera:
+
+    def __init__(self, geodesics: Geodesics, position: list[float], width: int, height: int, fov: float = np.pi/4, params: dict = None) -> None:
+        self._geodesics = geodesics
+        self.position = np.asarray(position, dtype=float)
+        self.width, self.height, self.fov = width, height, fov
+        self.params = {} if params is None else params
+
+        self.gₘₖ = geodesics.metric()(self.position, np.empty((4, 4)), *geodesics.param_values(self.params))
+        self.tetrad = self.__tetrad()
+
+    # Orthonormal frame of the observer, as the rows (e₀, e_r, e_θ, e_φ) of a (4, 4) array of coordinate components.
+    def __tetrad(self) -> np.array:
+        g = self.gₘₖ
+        e0 = np.linalg.inv(g)[0]
+        e0 = e0 * np.sign(e0[0]) / np.sqrt(np.abs(e0 @ g @ e0)) # Future directed
+        assert np.sign(e0 @ g @ e0) != np.sign(g[2, 2]), "The camera must be outside of the horizon."
+
+        tetrad = [e0]
+        for k in range(1, 4):
+            e = np.eye(4)[k]
+            for previous in tetrad:
+                e = e - (e @ g @ previous) / (previous @ g @ previous) * previous
+            tetrad.append(e / np.sqrt(np.abs(e @ g @ e)))
+        return np.array(tetrad)
+
+    # Initial (8, height*width) states of the rays of every pixel, row by row from the top left corner.
+    def initial_states(self) -> np.array:
+        e0, e_r, e_θ, e_φ = self.tetrad
+        tan = np.tan(self.fov / 2)
+        x = tan * ((2*np.arange(self.width) + 1) / self.width - 1)
+        y = tan * (1 - (2*np.arange(self.height) + 1) / self.height) * self.height / self.width
+        x, y = (grid.ravel() for grid in np.meshgrid(x, y))
+
+        n = (-e_r[:, None] + x * e_φ[:, None] - y * e_θ[:, None]) / np.sqrt(1 + x*x + y*y)
+        velocities = -e0[:, None] + n
+        return np.concatenate([np.repeat(self.position[:, None], x.size, axis=1), velocities])
+
+    # Ratio ν_observed/ν_emitted of the frequencies of the photons of every pixel, for sources at rest at infinity, i.e.
+    # 1/|p_t|, since p_t is conserved and the energy of the photons is 1 for the observer.
+    def redshift(self, states: np.array) -> np.array:
+        return 1 / np.abs(self.gₘₖ[0] @ states[4:8])
+
+# Geodesics of the worker process, set once by _init_worker().
+_worker_geodesics: Geodesics = None
+
+def _init_worker(geodesics: Geodesics) -> None:
+    global _worker_geodesics
+    _worker_geodesics = geodesics
+
+# Traces a batch of rays, in a worker process or in the calling one. Returns the final positions and the index of
+# the event which stopped each ray : 0 for escape, 1 for capture and -1 if neither within max_steps.
+def _trace_batch(states: np.array, settings: dict, geodesics: Geodesics = None) -> tuple[np.array, np.array]:
+    if geodesics is None: geodesics = _worker_geodesics
+    events = light_events(settings["r_horizon"], settings["r_escape"], settings["margin"], settings["radius_index"])
+
+    y, _, stopped = batch_dormand_prince(
+        geodesics.rhs("numpy"), states, settings["param_values"], events,
+        atol=settings["atol"], rtol=settings["rtol"], h0=settings["h0"], max_steps=settings["max_steps"]
+    )
+    return y[0:4], stopped
+
+### RayTracer class ###
+# Traces the rays of every pixel of a camera backward, in batches of vectorized rays integrated by
+# batch_dormand_prince() over a pool of processes. Rays are stopped at the escape radius or just outside of the
+# horizon, and nothing is kept of them but the compact per-pixel record of pixel_dtype : how the ray ended (status),
+# its final angles, and the redshift of the light coming from infinity, nan for the rays which did not escape.
+class RayTracer:
+    statuses: dict[int, str] = {0: "escaped", 1: "captured", -1: "unfinished"}
+    pixel_dtype: np.dtype = np.dtype([("status", np.int8), ("θ", np.float32), ("φ", np.float32), ("redshift", np.float32)])
+
+    def __init__(self, camera: Camera, r_horizon: float, r_escape: float, margin: float = 1e-3, radius_index: int = 1) -> None:
+        assert r_horizon < camera.position[radius_index] < r_escape
+        self.camera = camera
+        self.settings = {"r_horizon": r_horizon, "r_escape": r_escape, "margin": margin, "radius_index": radius_index}
+
+    # Traces every pixel. With workers=1, the batches are traced in the calling process.
+    def render(self, batch: int = 4096, workers: int = None, atol: float = 1e-8, rtol: float = 1e-8, h0: float = 1e-2, max_steps: int = 20000) -> np.array:
+        geodesics = self.camera._geodesics
+        if workers is None: workers = os.cpu_count()
+        settings = {**self.settings, "param_values": geodesics.param_values(self.camera.params), "atol": atol, "rtol": rtol, "h0": h0, "max_steps": max_steps}
+
+        states = self.camera.initial_states()
+        batches = [states[:, i:i + batch] for i in range(0, states.shape[1], batch)]
+
+        # Generated before sending the geodesics so that the workers do not have to.
+        geodesics.rhs("numpy")
+        if workers == 1:
+            results = [_trace_batch(states_batch, settings, geodesics) for states_batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(geodesics,)) as executor:
+                results = list(executor.map(_trace_batch, batches, [settings] * len(batches)))
+
+        positions = np.concatenate([position for position, _ in results], axis=1)
+        stopped   = np.concatenate([status for _, status in results])
+
+        pixels = np.empty(stopped.size, dtype=RayTracer.pixel_dtype)
+        pixels["status"] = stopped
+        pixels["θ"], pixels["φ"] = positions[2], positions[3]
+        pixels["redshift"] = np.where(stopped == 0, self.camera.redshift(states), np.nan)
+        return pixels.reshape(self.camera.height, self.camera.width)
+
+### celestial_image function ###
+# RGB image of the pixels of RayTracer.render(), for plt.imshow(). The sky is a checkerboard of "tiles" (θ, φ) cells,
+# so that lensing shows as the distortion of the grid, and its brightness is scaled by redshift**brightness. Captured
+# rays are black, and unfinished ones are red.
+def celestial_image(pixels: np.array, tiles: tuple[int, int] = (9, 18), colors: tuple = ((0.9, 0.9, 0.9), (0.2, 0.4, 0.8)), brightness: float = 0) -> np.array:
+    θ, φ = pixels["θ"], np.mod(pixels["φ"], 2*np.pi)
+    parity = (np.floor(θ / np.pi * tiles[0]) + np.floor(φ / (2*np.pi) * tiles[1])).astype(int) % 2
+
+    image = np.where(parity[..., None] == 0, np.array(colors[0]), np.array(colors[1]))
+    image = image * np.nan_to_num(pixels["redshift"] ** brightness, nan=1)[..., None]
+    image[pixels["status"] == 1] = 0
+    image[pixels["status"] == -1] = (1, 0, 0)
+    return np.clip(image, 0, 1).astype(np.float32)
@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+import signal
+import threading
+import time
+
+from sympy import *
+
+# Cheap targeted passes tried in this order by parallel_simplify(). Each pass is applied to the best form found so
+# far and only kept if it lowers the operation count. Passes must be module level functions to be sent to workers.
+simplify_passes: tuple[Callable] = (cancel, factor_terms, trigsimp)
+
+### parallel_simplify function ###
+# Simplifies every expression of a list, for instance the components of the acceleration, in a pool of processes.
+# Each component is first split into its terms, which are simplified independently, then the recombined component
+# is simplified as a whole. Every task has a wall-clock budget in seconds: when it runs out, the task stops and keeps
+# the best form found so far. Returns the simplified expressions and, for each of them, a report of the operation
+# count (sympy.count_ops) before and after, the amount of operations saved and whether a task ran out of time.
+def parallel_simplify(
+    expressions: list[Expr],
+    budget: float = 30,
+    workers: int = None,
+    passes: tuple[Callable] = simplify_passes,
+) -> tuple[list[Expr], list[dict]]:
+
+    expressions = [sympify(expression) for expression in expressions]
+    ops_before  = [count_ops(expression) for expression in expressions]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def run(tasks: list[Expr]) -> list[tuple[Expr, bool]]:
+            return list(executor.map(_simplify_task, tasks, [passes] * len(tasks), [budget] * len(tasks)))
+
+        # First round : every term of every component.
+        terms = [Add.make_args(expression) for expression in expressions]
+        results = iter(run([term for component in terms for term in component]))
+
+        components, timed_out = [], []
+        for component in terms:
+            simplified = [next(results) for _ in component]
+            components.append(Add(*[term for term, _ in simplified]))
+            timed_out.append(any(out for _, out in simplified))
+
+        # Second round : the recombined components, where terms may now cancel or share factors.
+        results = run(components)
+
+    simplified_expressions, reports = [], []
+    for k, (expression, (simplified, out)) in enumerate(zip(expressions, results)):
+        if count_ops(simplified) > ops_before[k]: simplified = expression # Recombining may cost more than it saved.
+        ops_after = count_ops(simplified)
+
+        simplified_expressions.append(simplified)
+        reports.append({
+            "component" : k,
+            "ops_before": ops_before[k],
+            "ops_after" : ops_after,
+            "saved"     : ops_before[k] - ops_after,
+            "timed_out" : timed_out[k] or out,
+        })
+    return simplified_expressions, reports
+
+class _Timeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+# Applies the passes to one expression in a worker. The budget is enforced with SIGALRM where available, which also
+# interrupts a pass that hangs. Elsewhere, the budget is only checked between passes. Returns (best form, timed out).
+def _simplify_task(expression: Expr, passes: tuple[Callable], budget: float) -> tuple[Expr, bool]:
+    best, best_ops = expression, count_ops(expression)
+    start = time.perf_counter()
+    timed_out = False
+
+    use_alarm = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, budget)
+
+    try:
+        for simplification in passes:
+            if time.perf_counter() - start > budget:
+                timed_out = True
+                break
+            candidate = simplification(best)
+            candidate_ops = count_ops(candidate)
+            if candidate_ops < best_ops: best, best_ops = candidate, candidate_ops
+    except _Timeout:
+        timed_out = True
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    return best, timed_out
@@ -0,0 +1,89 @@
+import os
+import pickle
+import struct
+import tempfile
+
+import numpy as np
+
+### TrajectoryStore class ###
+# Appends a trajectory, chunk by chunk, to a .npy file of shape (points, columns) which can then be memory-mapped.
+# Each row is one point, e.g. [s, x⁰..x³, u⁰..u³], so that chunks are appended contiguously. The header is written
+# with a fixed size and updated after every chunk, so the file is a valid .npy file at all times.
+class TrajectoryStore:
+    header_size: int = 128 # Multiple of 64, as required by the .npy format, and large enough for any shape.
+
+    def __init__(self, path: str, columns: int) -> None:
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+
+        self._file = open(path, "wb")
+        self._file.write(self.__header())
+
+    # Appends a (columns, n) chunk, as given by the solvers.
+    def append(self, chunk: np.array) -> None:
+        chunk = np.asarray(chunk, dtype="<f8")
+        assert chunk.shape[0] == self.columns
+
+        self._file.write(np.ascontiguousarray(chunk.T).tobytes())
+        self.rows += chunk.shape[1]
+
+        self._file.seek(0)
+        self._file.write(self.__header())
+        self._file.seek(0, 2)
+        self._file.flush()
+
+    # Reopens a stored trajectory to append to it, keeping only its first "rows" points. Points appended after the
+    # last checkpoint of an interrupted integration are thus dropped, since they are integrated again when resuming.
+    @classmethod
+    def reopen(cls, path: str, rows: int) -> "TrajectoryStore":
+        store = cls.__new__(cls)
+        store.path = path
+        store.columns = TrajectoryStore.load(path).shape[1]
+        store.rows = rows
+
+        store._file = open(path, "r+b")
+        store._file.truncate(TrajectoryStore.header_size + rows * store.columns * 8)
+        store._file.write(store.__header())
+        store._file.seek(0, 2)
+        store._file.flush()
+        return store
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    # Memory-maps a stored trajectory. Nothing is read from the disk until the array is accessed.
+    @staticmethod
+    def load(path: str) -> np.memmap:
+        return np.load(path, mmap_mode="r")
+
+    def __header(self) -> bytes:
+        header = repr({"descr": "<f8", "fortran_order": False, "shape": (self.rows, self.columns)})
+        header = header.ljust(TrajectoryStore.header_size - 11) + "\n"
+        return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+checkpoint_version: int = 1
+
+### write_checkpoint function ###
+# Writes the checkpoint of an integration, a dictionary, to a temporary file which then replaces the previous
+# checkpoint. The replacement is atomic, so a process killed at any time leaves either the previous or the new
+# checkpoint, never a partial one.
+def write_checkpoint(path: str, checkpoint: dict) -> None:
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(descriptor, "wb") as file:
+        pickle.dump({"version": checkpoint_version, **checkpoint}, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+def read_checkpoint(path: str) -> dict:
+    with open(path, "rb") as file:
+        checkpoint = pickle.load(file)
+    assert checkpoint.get("version") == checkpoint_version, "The checkpoint was written by another version of geodpy."
+    return checkpoint
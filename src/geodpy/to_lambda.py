@@ -1,18 +1,144 @@
 from .coordinates import Coordinates
 
 from typing import Callable
+import hashlib
+import importlib.util
+import inspect
+import linecache
+import math
+import os
+import sys
+import warnings
 
 from sympy import *
+from sympy.printing.pycode import PythonCodePrinter
+from sympy.printing.numpy import NumPyPrinter
+import numpy
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 # Converts tensor arrays into lambda expressions, for later integration. Array must only depend on coordinates and their first derivative.
-def vector_to_lambda(coordinates: Coordinates, expressions: Array) -> list[Callable]:
+# Free parameters of the metric, if any, are taken as extra arguments after the coordinates and their derivatives.
+def vector_to_lambda(coordinates: Coordinates, expressions: Array, params: tuple[Symbol] = ()) -> list[Callable]:
     assert expressions.shape[0] == len(coordinates.coords)
     lambda_functions : list[Function] = []
     for k, expr in enumerate(expressions):
-        lambda_functions.append(expr_to_lambda(coordinates, expr))
+        lambda_functions.append(expr_to_lambda(coordinates, expr, params))
     return lambda_functions
 
-def expr_to_lambda(coordinates: Coordinates, expression: Function) -> Callable:
+def expr_to_lambda(coordinates: Coordinates, expression: Function, params: tuple[Symbol] = ()) -> Callable:
     args = list(coordinates.coords)
     args.extend([coord.diff(coordinates.interval) for coord in coordinates.coords])
+    args.extend(params)
     return lambdify(args, expression, ["scipy", "numpy"], cse=False, docstring_limit=0)
+
+# Converts a matrix of expressions into a single lambda function returning a 2D numpy array, e.g. for Jacobians.
+def matrix_to_lambda(coordinates: Coordinates, matrix: Matrix, params: tuple[Symbol] = ()) -> Callable:
+    return expr_to_lambda(coordinates, matrix, params)
+
+# Converts the acceleration vector into one generated function for the whole first order system, f(y, out, *params).
+# Common subexpressions are eliminated across all components, so sin(θ), Δ, etc. are evaluated only once per call.
+# The state y = (x⁰..x³, u⁰..u³) is unpacked, and the derivative of the state is written into the preallocated
+# buffer "out", which is returned. With module="math", the function uses the math module, which is much faster than
+# numpy ufuncs on scalars. With module="numpy", y and out may have an extra dimension to evaluate many states at once.
+def fused_vector_to_lambda(coordinates: Coordinates, expressions: Array, params: tuple[Symbol] = (), module: str = "math") -> Callable:
+    assert expressions.shape[0] == len(coordinates.coords)
+    dim = len(coordinates.coords)
+
+    assignments = [(f"out[{k}]", coord.diff(coordinates.interval)) for k, coord in enumerate(coordinates.coords)]
+    assignments.extend([(f"out[{dim + k}]", expr) for k, expr in enumerate(expressions)])
+    return source_to_lambda(_fused_source(coordinates, assignments, params, module))
+
+# Converts the jacobian of the acceleration vector, ∂(∂ₛuᵏ)/∂yʲ, into one generated function f(y, out, *params) which
+# writes the jacobian of the whole first order system into the preallocated (8, 8) buffer "out".
+def fused_jacobian_to_lambda(coordinates: Coordinates, jacobian: Matrix, params: tuple[Symbol] = (), module: str = "math") -> Callable:
+    dim = len(coordinates.coords)
+    assert jacobian.shape == (dim, 2*dim)
+
+    assignments = [(f"out[{j}, {k}]", S.One if k == j + dim else S.Zero) for j in range(dim) for k in range(2*dim)]
+    assignments.extend([(f"out[{dim + j}, {k}]", jacobian[j, k]) for j in range(dim) for k in range(2*dim)])
+    return source_to_lambda(_fused_source(coordinates, assignments, params, module))
+
+# Converts a list of expressions, like the full right hand side of a first order system, into one generated function
+# f(y, out, *params) writing expressions[k] into out[k]. The second half of the state is given by the derivatives of
+# the coordinates in the expressions, even if it stands for something else, like the momenta of HamiltonianGeodesics.
+def fused_system_to_lambda(coordinates: Coordinates, expressions: list[Expr], params: tuple[Symbol] = (), module: str = "math") -> Callable:
+    assignments = [(f"out[{k}]", expr) for k, expr in enumerate(expressions)]
+    return source_to_lambda(_fused_source(coordinates, assignments, params, module))
+
+# Converts a matrix, like the full jacobian of a first order system, into one generated function f(y, out, *params)
+# writing it into the preallocated buffer "out". The state vector is given as in fused_system_to_lambda().
+def fused_matrix_to_lambda(coordinates: Coordinates, matrix: Matrix, params: tuple[Symbol] = (), module: str = "math") -> Callable:
+    assignments = [(f"out[{j}, {k}]", matrix[j, k]) for j in range(matrix.shape[0]) for k in range(matrix.shape[1])]
+    return source_to_lambda(_fused_source(coordinates, assignments, params, module))
+
+# Generates the source of a function f(y, out, *params) performing the given assignments into "out".
+def _fused_source(coordinates: Coordinates, assignments: list[tuple[str, Expr]], params: tuple[Symbol], module: str) -> str:
+    printer = {"math": PythonCodePrinter, "numpy": NumPyPrinter}[module]({"fully_qualified_modules": True})
+
+    dim = len(coordinates.coords)
+    positions  = symbols(f"x0:{dim}")
+    velocities = symbols(f"v0:{dim}")
+    param_args = symbols(f"p0:{len(params)}")
+
+    substitutions = {coord.diff(coordinates.interval): velocity for coord, velocity in zip(coordinates.coords, velocities)}
+    substitutions.update({param: arg for param, arg in zip(params, param_args)})
+    substituted = [sympify(expr).xreplace(substitutions) for _, expr in assignments]
+    substituted = [expr.xreplace(dict(zip(coordinates.coords, positions))) for expr in substituted]
+
+    subexpressions, reduced = cse(substituted, symbols=numbered_symbols("c"))
+
+    # Expressions of the positions only, like coordinate transforms, also accept states made of positions alone.
+    lines = [f"def _lambdifygenerated(y, out{''.join(f', {arg}' for arg in param_args)}):"]
+    if any(expr.has(*velocities) for expr in substituted): lines.append(f"    {', '.join(map(str, positions + velocities))} = y")
+    else: lines.append(f"    {', '.join(map(str, positions))} = y[0:{dim}]")
+    for symbol, subexpression in subexpressions:
+        lines.append(f"    {symbol} = {printer.doprint(subexpression)}")
+    for (target, _), expr in zip(assignments, reduced):
+        lines.append(f"    {target} = {printer.doprint(expr)}")
+    lines.append("    return out")
+
+    return "\n".join(lines) + "\n"
+
+# JIT-compiles a function generated by fused_vector_to_lambda() or fused_jacobian_to_lambda() with numba. The source
+# is written as a module in "directory" so that numba can cache the compiled code across processes. Falls back to
+# the uncompiled function, with a warning, if numba is not installed.
+def jit_lambda(function: Callable, directory: str) -> Callable:
+    if numba is None:
+        warnings.warn("numba is not installed, falling back to the python backend.", RuntimeWarning)
+        return function
+
+    source = lambda_source(function)
+    module_name = f"geodpy_jit_{hashlib.sha256(source.encode()).hexdigest()[:32]}"
+    path = os.path.join(directory, f"{module_name}.py")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            file.write(f"import math\nimport numpy\nimport numba\n\n@numba.njit(cache=True)\n{source}")
+
+    # Registered in sys.modules since numba imports the module by name when loading cached code.
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        sys.modules[module_name] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules[module_name])
+    return sys.modules[module_name]._lambdifygenerated
+
+# Returns the generated python source of a lambda function created by lambdify. The decorator of the functions
+# compiled by jit_lambda() is left out.
+def lambda_source(function: Callable) -> str:
+    source = inspect.getsource(function)
+    return source[source.index("def "):]
+
+# Rebuilds a lambda function from the source returned by lambda_source(), in the same namespace lambdify would use.
+# The source is registered in linecache like lambdify does, so that lambda_source() also works on the result.
+def source_to_lambda(source: str) -> Callable:
+    namespace = dict(lambdify([], 0, ["scipy", "numpy"]).__globals__)
+    namespace.update({"math": math, "numpy": numpy})
+
+    file_name = f"<geodpy_generated_{abs(hash(source))}>"
+    linecache.cache[file_name] = (len(source), None, source.splitlines(True), file_name)
+    exec(compile(source, file_name, "exec"), namespace)
+    return namespace["_lambdifygenerated"]
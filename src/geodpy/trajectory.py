@@ -0,0 +1,63 @@
+import numpy as np
+
+### Trajectory class ###
+# Compact container of the points of a trajectory : a single contiguous (N, columns) buffer where each row is one
+# point [s, x⁰..x³, u⁰..u³], followed by [p₀..p₃] for HamiltonianGeodesics. This is also the layout of the files of
+# TrajectoryStore, so a streamed trajectory is wrapped without being read. The interval, positions, velocities and
+# momenta are views of the buffer, with the (4, N) shape used by Body. Trajectories only used for plotting can be
+# stored in float32, which halves their memory.
+class Trajectory:
+    __slots__ = ("data",)
+
+    # Rows of [s, x⁰..x³], of [s, x⁰..x³, u⁰..u³] and of [s, x⁰..x³, u⁰..u³, p₀..p₃] respectively.
+    layouts: tuple[int] = (5, 9, 13)
+
+    def __init__(self, data: np.array) -> None:
+        assert data.ndim == 2 and data.shape[1] in Trajectory.layouts
+        self.data = data
+
+    # Copies the arrays returned by the solvers, s of shape (N,) and (4, N) arrays, into a new buffer.
+    @classmethod
+    def from_arrays(cls, s: np.array, pos: np.array, vel: np.array = None, mom: np.array = None, dtype: type = np.float64) -> "Trajectory":
+        vectors = [pos] + ([vel] if vel is not None else []) + ([mom] if mom is not None else [])
+        data = np.empty((len(s), 1 + 4*len(vectors)), dtype=dtype)
+        data[:, 0] = s
+        for k, vector in enumerate(vectors):
+            data[:, 1 + 4*k : 5 + 4*k] = np.asarray(vector).T
+        return cls(data)
+
+    @property
+    def s(self) -> np.array:
+        return self.data[:, 0]
+
+    @property
+    def pos(self) -> np.array:
+        return self.data[:, 1:5].T
+
+    @property
+    def vel(self) -> np.ndarray | None:
+        return self.data[:, 5:9].T if self.data.shape[1] >= 9 else None
+
+    @property
+    def mom(self) -> np.ndarray | None:
+        return self.data[:, 9:13].T if self.data.shape[1] == 13 else None
+
+    # (8, N) positions and velocities, as integrated by the solvers for Geodesics.
+    @property
+    def state(self) -> np.ndarray | None:
+        return self.data[:, 1:9].T if self.data.shape[1] >= 9 else None
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.data.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    # Copy of the trajectory stored with another precision, e.g. np.float32 for plotting.
+    def astype(self, dtype: type) -> "Trajectory":
+        return Trajectory(np.ascontiguousarray(self.data, dtype=dtype))
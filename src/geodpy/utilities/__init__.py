@@ -1 +1,2 @@
 from .base_run import basic
+from .sweep import sweep
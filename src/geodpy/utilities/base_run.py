@@ -1,6 +1,7 @@
 from ..geodesics import Geodesics
 from ..body import Body
 from ..coordinates import Coordinates
+from ..cache import GeodesicsCache
 
 from sympy import *
 import matplotlib.patches as patches
@@ -8,6 +9,16 @@ import matplotlib.patches as patches
 # Possible symbols
 #τ,t,r,a,b,c,θ,φ,η,ψ,x,y 
 
+# Sets default values in case they were unspecified
+def _set_default_solver_kwargs(solver_kwargs: dict) -> dict:
+    solver_kwargs.setdefault("time_interval", (0,100)                               )
+    solver_kwargs.setdefault("method"       , "Radau"                               )
+    solver_kwargs.setdefault("max_step"     , solver_kwargs["time_interval"][1]*1e-3)
+    solver_kwargs.setdefault("atol"         , 1e-8                                  )
+    solver_kwargs.setdefault("rtol"         , 1e-8                                  )
+    solver_kwargs.setdefault("events"       , None                                  )
+    return solver_kwargs
+
 ### basic function ###
 # The examples folder of the project uses this function to execute all its examples.
 # This is in order to unify the similar logic/algorithm behind all tests.
@@ -18,24 +29,23 @@ def basic(
     initial_vel:   list[float],
     simplify:      bool,
     solver_kwargs: dict = {},
-    verbose:       int  = 0
+    verbose:       int  = 0,
+    params:        dict = {},
+    cache:         GeodesicsCache = None,
+    photon:        bool = False
 ) -> None:
 
-    # Sets default values in case they were unspecified
-    solver_kwargs.setdefault("time_interval", (0,100)                               )
-    solver_kwargs.setdefault("method"       , "Radau"                               )
-    solver_kwargs.setdefault("max_step"     , solver_kwargs["time_interval"][1]*1e-3)
-    solver_kwargs.setdefault("atol"         , 1e-8                                  )
-    solver_kwargs.setdefault("rtol"         , 1e-8                                  )
-    solver_kwargs.setdefault("events"       , None                                  )
+    _set_default_solver_kwargs(solver_kwargs)
 
     print("Calculating geodesics")
-    geodesics: Geodesics = Geodesics(coordinates, g_mk)
+    geodesics: Geodesics = Geodesics(coordinates, g_mk, tuple(params.keys()), cache)
     if simplify is True: geodesics.simplify()
-    body = Body(geodesics, initial_pos, initial_vel)
+    # For light, initial_vel is the spatial direction, and uᵗ is solved from the null condition (see Body.photon()).
+    if photon: body = Body.photon(geodesics, initial_pos, initial_vel, params=params)
+    else: body = Body(geodesics, initial_pos, initial_vel)
 
     print("Solving trajectory")
-    body.solve_trajectory(**solver_kwargs)
+    body.solve_trajectory(params=params, **solver_kwargs)
 
     # Printing
     if verbose == 2:
@@ -0,0 +1,88 @@
+from ..geodesics import Geodesics
+from ..body import Body
+from ..trajectory import Trajectory
+from ..coordinates import Coordinates
+from ..cache import GeodesicsCache
+from .base_run import _set_default_solver_kwargs
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+import itertools
+import os
+import pickle
+
+from sympy import *
+
+# Possible symbols
+#τ,t,r,a,b,c,θ,φ,η,ψ,x,y 
+
+# Geodesics of the worker process, rebuilt once from its pickled form by _init_worker().
+_worker_geodesics: Geodesics = None
+
+def _init_worker(geodesics: Geodesics) -> None:
+    global _worker_geodesics
+    _worker_geodesics = geodesics
+
+# Solves a chunk of (index, initial_pos, initial_vel, params) tasks in a worker process. Only the buffer of each
+# trajectory is sent back, the Body objects are rebuilt by the parent process.
+def _solve_chunk(chunk: list[tuple], solver_kwargs: dict) -> list[tuple]:
+    results = []
+    for index, initial_pos, initial_vel, params in chunk:
+        body = Body(_worker_geodesics, initial_pos, initial_vel)
+        body.solve_trajectory(params=params, **solver_kwargs)
+        results.append((index, params, body.trajectory.data))
+    return results
+
+### sweep function ###
+# Runs the same metric for every combination of initial conditions and parameter values over a pool of processes.
+# The geodesics are derived once, in the calling process, then sent to the workers which rebuild their lambda
+# functions from the generated source. Results are yielded in completion order, as (index, params, body) where index
+# is the position of the initial conditions in the given lists. The solver kwargs are sent to the workers as well, so
+# their events must be picklable, like the ones of geodpy.events.
+def sweep(
+    coordinates:   Coordinates,
+    g_mk:          Matrix,
+    initial_pos:   list[list[float]],
+    initial_vel:   list[list[float]],
+    simplify:      bool,
+    solver_kwargs: dict = {},
+    params_grid:   dict = {},
+    workers:       int  = None,
+    chunksize:     int  = None,
+    cache:         GeodesicsCache = None
+) -> Iterator[tuple[int, dict, Body]]:
+    assert len(initial_pos) == len(initial_vel)
+
+    solver_kwargs = _set_default_solver_kwargs(dict(solver_kwargs))
+    if workers is None: workers = os.cpu_count()
+    try:
+        pickle.dumps(solver_kwargs)
+    except (pickle.PicklingError, AttributeError, TypeError) as error:
+        raise ValueError(f"The solver kwargs must be picklable to be sent to the workers, use the events of geodpy.events or functions defined at the top level of a module. {error}") from error
+
+    print("Calculating geodesics")
+    geodesics: Geodesics = Geodesics(coordinates, g_mk, tuple(params_grid.keys()), cache)
+    if simplify is True: geodesics.simplify()
+
+    # Generated before sending the geodesics so that the workers do not have to.
+    geodesics.rhs()
+    if solver_kwargs["method"] in Body.implicit_methods: geodesics.jacobian()
+
+    # Every combination of initial conditions and parameter values
+    params_list = [dict(zip(params_grid.keys(), values)) for values in itertools.product(*params_grid.values())]
+    tasks = [
+        (index, initial_pos[index], initial_vel[index], params)
+        for index in range(len(initial_pos))
+        for params in params_list
+    ]
+    if chunksize is None: chunksize = max(1, len(tasks) // (4 * workers))
+    chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+    print(f"Solving {len(tasks)} trajectories")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(geodesics,)) as executor:
+        futures = [executor.submit(_solve_chunk, chunk, solver_kwargs) for chunk in chunks]
+        for future in as_completed(futures):
+            for index, params, data in future.result():
+                body = Body(geodesics, initial_pos[index], initial_vel[index])
+                body.trajectory, body.params = Trajectory(data), params
+                yield index, params, body
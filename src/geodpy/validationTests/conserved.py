@@ -0,0 +1,103 @@
+from .. import Body, Geodesics
+from ..to_lambda import fused_system_to_lambda
+
+from sympy import *
+import numpy as np
+
+### ConservationCheck class ###
+# Checks the conserved quantities of geodesics along solved trajectories, for any metric. Every coordinate on which
+# the metric does not depend gives a Killing vector ∂ₖ, and thus the conserved covariant component pₖ = gₖₘ uᵐ of the
+# 4-velocity, e.g. the energy p_t and the angular momentum p_φ of the Schwarzschild and Kerr metrics. The norm
+# gₘₖ uᵐ uᵏ is conserved along any geodesic, and the Carter constant is added for the Kerr metric when its spin "a"
+# is given. All the quantities are generated as one function with the common subexpressions eliminated, see
+# fused_system_to_lambda(), and evaluated at once on the points of all the trajectories, so a check costs a single
+# pass over the points. The drift of each quantity from its initial value is reduced to its maximum, its root mean
+# square and the index of the first point where it exceeds the tolerance.
+class ConservationCheck:
+
+    def __init__(self, geodesics: Geodesics, quantities: dict[str, Expr] = None, params: dict = None, kerr_a: Expr | float = None) -> None:
+        self._geodesics = geodesics
+        self._coordinates = geodesics._coordinates
+        self.param_values = geodesics.param_values(params)
+
+        if quantities is None:
+            quantities = killing_quantities(geodesics)
+            quantities["norm"] = norm_expression(geodesics)
+            if kerr_a is not None: quantities["carter"] = carter_constant(geodesics, kerr_a)
+        self.quantities = dict(quantities)
+
+        self._function = geodesics._compile(fused_system_to_lambda(self._coordinates, list(self.quantities.values()), geodesics._params, "numpy"))
+
+    # (Q, N) values of the quantities at the given (8, N) states of positions and 4-velocities.
+    def evaluate(self, states: np.array) -> np.array:
+        states = np.asarray(states, dtype=float)
+        return self._function(states, np.empty((len(self.quantities),) + states.shape[1:]), *self.param_values)
+
+    # Drift statistics of one body, or of every body of a list, e.g. the bodies returned by Ensemble.solve_trajectory().
+    # Returns, for each quantity, its initial value, the maximum and the root mean square of |Q - Q₀|, and the index of
+    # the first point where |Q - Q₀| > tol, or -1. With relative=True, the drift is divided by |Q₀| when it is not zero.
+    def __call__(self, bodies: Body | list[Body], tol: float = 1e-6, relative: bool = False) -> dict | list[dict]:
+        single = isinstance(bodies, Body)
+        if single: bodies = [bodies]
+        assert all(body.vel is not None for body in bodies), "The bodies must have their 4-velocities."
+
+        lengths = np.array([len(body.trajectory) for body in bodies])
+        starts  = np.append(0, np.cumsum(lengths)[:-1])
+        values  = self.evaluate(np.concatenate([body.trajectory.state for body in bodies], axis=1))
+
+        initial = values[:, starts]
+        drift = np.abs(values - np.repeat(initial, lengths, axis=1))
+        if relative:
+            scale = np.where(initial != 0, np.abs(initial), 1)
+            drift /= np.repeat(scale, lengths, axis=1)
+
+        maximum = np.maximum.reduceat(drift, starts, axis=1)
+        rms     = np.sqrt(np.add.reduceat(drift * drift, starts, axis=1) / lengths)
+
+        # First violation of each body : the first violating point at or after its start, if it is before its end.
+        first = np.full(values.shape[0:1] + starts.shape, -1)
+        for q in range(values.shape[0]):
+            violations = np.flatnonzero(drift[q] > tol)
+            index = np.searchsorted(violations, starts)
+            found = index < violations.size
+            found[found] = violations[index[found]] < (starts + lengths)[found]
+            first[q, found] = violations[index[found]] - starts[found]
+
+        reports = [{name: {"initial": float(initial[q, b]), "max": float(maximum[q, b]), "rms": float(rms[q, b]), "first_violation": int(first[q, b])}
+                    for q, name in enumerate(self.quantities)} for b in range(len(bodies))]
+        return reports[0] if single else reports
+
+### killing_quantities function ###
+# Conserved covariant components pₖ = gₖₘ uᵐ of the 4-velocity, one for each coordinate on which the metric does not
+# depend, named after the coordinate, e.g. "p_t" and "p_φ".
+def killing_quantities(geodesics: Geodesics) -> dict[str, Expr]:
+    coordinates = geodesics._coordinates
+    uᵐ = Matrix([coord.diff(coordinates.interval) for coord in coordinates.coords])
+
+    quantities: dict[str, Expr] = {}
+    for k, (coord, name) in enumerate(zip(coordinates.coords, coordinates.coords_string)):
+        if geodesics._gₘₖ.has(coord): continue
+        quantities[f"p_{name}"] = (geodesics._gₘₖ[k, :] * uᵐ)[0]
+    return quantities
+
+# Norm gₘₖ uᵐ uᵏ of the 4-velocity.
+def norm_expression(geodesics: Geodesics) -> Expr:
+    coordinates = geodesics._coordinates
+    uᵐ = Matrix([coord.diff(coordinates.interval) for coord in coordinates.coords])
+    return (uᵐ.T * geodesics._gₘₖ * uᵐ)[0]
+
+### carter_constant function ###
+# Carter constant K = p_θ² + cos²θ (a² (μ² - E²) + L²/sin²θ) of the Kerr metric in Boyer-Lindquist coordinates, with
+# E = ±p_t, L = ±p_φ and μ² = -σ gₘₖ uᵐ uᵏ, 1 for massive bodies and 0 for light, where σ is the sign of g_θθ, so
+# that both signatures (+---) and (-+++) are handled. "a" is either a number or the symbol of the spin in the metric.
+def carter_constant(geodesics: Geodesics, a: Expr | float, time_index: int = 0, theta_index: int = 2, phi_index: int = 3) -> Expr:
+    coordinates = geodesics._coordinates
+    gₘₖ = geodesics._gₘₖ
+    uᵐ = Matrix([coord.diff(coordinates.interval) for coord in coordinates.coords])
+    pₘ = gₘₖ * uᵐ
+    θ  = coordinates.coords[theta_index]
+
+    σ  = sign(gₘₖ[theta_index, theta_index].subs(θ, pi/2).subs({param: 1 for param in geodesics._params}).subs({coord: 1 for coord in coordinates.coords}))
+    μ2 = -σ * norm_expression(geodesics)
+    E, L = pₘ[time_index], pₘ[phi_index]
+    return pₘ[theta_index]**2 + cos(θ)**2 * (a**2 * (μ2 - E**2) + L**2 / sin(θ)**2)
@@ -0,0 +1,94 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+from sympy import symbols, Matrix, sin
+
+from geodpy import Geodesics, Body, horizon_event, escape_event
+from geodpy.coordinates import Spherical
+from geodpy.integrators import fixed_step_methods, batch_dormand_prince
+
+rs = symbols("rs")
+t, r, θ, φ = Spherical.coords
+g_mk = Matrix([[1 - rs/r, 0, 0, 0], [0, -1/(1 - rs/r), 0, 0], [0, 0, -r**2, 0], [0, 0, 0, -r**2*sin(θ)**2]])
+geodesics = Geodesics(Spherical, g_mk, (rs,))
+
+# Radial fall from rest at r = 3, which reaches the horizon r = 1 at s ≈ 7.
+initial_pos = [0, 3, np.pi/2, 0]
+initial_vel = [1/np.sqrt(1 - 1/3), 0, 0, 0]
+
+# System y' = (1, 1/√(1 - y₀)) with y₀ = s, which is not defined past s = 1. The math version raises there, like the
+# generated functions of the "math" module, and the numpy version returns NaN.
+def math_rhs(y, out):
+    out[0], out[1] = 1, 1 / math.sqrt(1 - y[0])
+    return out
+
+def numpy_rhs(y, out):
+    out[0], out[1] = 1, 1 / np.sqrt(1 - y[0])
+    return out
+
+def jacobian(y, out):
+    out[:] = 0
+    out[1, 0] = (1 - y[0])**-1.5 / 2
+    return out
+
+@pytest.mark.parametrize("rhs", [math_rhs, numpy_rhs])
+@pytest.mark.parametrize("method", fixed_step_methods)
+def test_failed_step_ends_integration(method, rhs):
+    s = np.linspace(0, 2, 9)
+    y = np.empty((2, s.size))
+    y[:, 0] = 0
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning) # Newton's method does not converge near s = 1.
+        points, status, message = fixed_step_methods[method](rhs, jacobian, s, y, ())
+
+    assert status == -1
+    assert "failed" in message
+    assert 1 < points <= 5 # The last points are at most s = 1.
+    assert np.all(np.isfinite(y[:, :points]))
+
+@pytest.mark.parametrize("method", fixed_step_methods)
+def test_completed_integration(method):
+    s = np.linspace(0, 0.5, 11)
+    y = np.zeros((2, s.size))
+
+    points, status, _ = fixed_step_methods[method](math_rhs, jacobian, s, y, ())
+
+    assert (points, status) == (s.size, 0)
+    assert y[1, -1] == pytest.approx(2 - 2*np.sqrt(0.5), rel=1e-3)
+
+@pytest.mark.filterwarnings("ignore:Newton's method")
+def test_body_stops_on_failed_step():
+    body = Body(geodesics, initial_pos, initial_vel)
+    with pytest.warns(RuntimeWarning, match="Step failed"):
+        body.solve_trajectory((0, 20), method="ImplicitMidpoint", max_step=0.1, params={rs: 1})
+
+    assert body.s[-1] < 20
+    assert np.all(np.isfinite(body.trajectory.data))
+
+@pytest.mark.filterwarnings("ignore:Newton's method")
+def test_terminal_event_before_failure():
+    body = Body(geodesics, initial_pos, initial_vel)
+    body.solve_trajectory((0, 20), method="ImplicitMidpoint", max_step=0.1, params={rs: 1}, events=[horizon_event(1)])
+
+    assert body.pos[1, -2] > 1.001 >= body.pos[1, -1]
+
+# Rays moving outward with r' = 1 + r/10, whose radius is r(s) = 10 (1.2 exp(s/10) - 1) from r = 2, stopped at r = 30.
+def test_batch_stops_on_the_crossing():
+    def rhs(y, out):
+        out[:] = 0
+        out[1] = 1 + y[1]/10
+        out[3] = 0.05
+        return out
+
+    y = np.zeros((8, 3))
+    y[1] = 2
+    y_end, s_end, stopped = batch_dormand_prince(rhs, y, (), [escape_event(30)], atol=1e-10, rtol=1e-10, h0=5)
+
+    s_exact = 10 * np.log(4 / 1.2)
+    assert np.all(stopped == 0)
+    assert s_end == pytest.approx(s_exact, rel=1e-9)
+    assert y_end[1] == pytest.approx(30, rel=1e-9)
+    assert y_end[3] == pytest.approx(0.05 * s_exact, rel=1e-9)
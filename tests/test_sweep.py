@@ -0,0 +1,42 @@
+import pickle
+
+import numpy as np
+import pytest
+from sympy import symbols, Matrix, sin
+
+from geodpy import Geodesics, horizon_event, escape_event, light_events, periapsis_event, apoapsis_event, static_limit_event
+from geodpy.coordinates import Spherical
+from geodpy.utilities import sweep
+
+rs = symbols("rs")
+t, r, θ, φ = Spherical.coords
+g_mk = Matrix([[1 - rs/r, 0, 0, 0], [0, -1/(1 - rs/r), 0, 0], [0, 0, -r**2, 0], [0, 0, 0, -r**2*sin(θ)**2]])
+
+def test_events_are_picklable():
+    geodesics = Geodesics(Spherical, g_mk, (rs,))
+    events = [horizon_event(1), escape_event(50), *light_events(1, 50), periapsis_event(), apoapsis_event(), static_limit_event(geodesics, {rs: 1})]
+    y = np.array([0, 5, np.pi/2, 0, 1.2, -0.3, 0, 0.01])
+
+    for event in events:
+        copy = pickle.loads(pickle.dumps(event))
+        assert copy(0, y) == pytest.approx(event(0, y))
+        assert (copy.terminal, copy.direction) == (event.terminal, event.direction)
+
+def test_sweep_stops_at_horizon():
+    # Bodies falling radially from rest, stopped just outside of the horizon r = rs.
+    initial_pos = [[0, 5, np.pi/2, 0], [0, 8, np.pi/2, 0]]
+    initial_vel = [[1/np.sqrt(1 - 1/5), 0, 0, 0], [1/np.sqrt(1 - 1/8), 0, 0, 0]]
+    solver_kwargs = {"time_interval": (0, 100), "method": "RK45", "max_step": np.inf, "events": [horizon_event(1)]}
+
+    results = list(sweep(Spherical, g_mk, initial_pos, initial_vel, False, solver_kwargs, {rs: [1]}, workers=2))
+
+    assert len(results) == 2
+    for index, params, body in results:
+        assert params == {rs: 1}
+        assert body.s[-1] < 100
+        assert body.pos[1, -1] == pytest.approx(1.001, rel=1e-6)
+
+def test_sweep_rejects_unpicklable_events():
+    solver_kwargs = {"time_interval": (0, 10), "events": [lambda s, y: y[1] - 2]}
+    with pytest.raises(ValueError):
+        next(sweep(Spherical, g_mk, [[0, 5, np.pi/2, 0]], [[1.2, 0, 0, 0]], False, solver_kwargs, {rs: [1]}, workers=1))